@@ -0,0 +1,47 @@
+import settings
+from admin.routes import schemas
+from db import engine
+from fastapi import APIRouter
+from user.cache import member_cache
+
+# /api/v1/admin
+router = APIRouter()
+
+
+@router.get("/member_cache", summary="Statistics of this worker's member cache")
+async def get_member_cache_stats() -> schemas.MemberCacheStatsResponse:
+    lookups = member_cache.hits + member_cache.misses
+    return schemas.MemberCacheStatsResponse(
+        size=len(member_cache),
+        max_size=member_cache.max_size,
+        ttl_seconds=member_cache.ttl_seconds,
+        hits=member_cache.hits,
+        misses=member_cache.misses,
+        hit_ratio=member_cache.hits / lookups if lookups else 0.0,
+    )
+
+
+@router.get("/pool", summary="Statistics of this worker's database connection pool")
+async def get_pool_stats() -> schemas.PoolStatsResponse:
+    pool = engine.pool
+    return schemas.PoolStatsResponse(
+        pool_size=pool.size(),
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        timeout_seconds=pool.timeout(),
+        recycle_seconds=settings.DB_POOL_RECYCLE,
+        pre_ping=settings.DB_POOL_PRE_PING,
+        statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+        checked_out=pool.checkedout(),
+        checked_in=pool.checkedin(),
+        # Negative while the pool has not opened pool_size connections yet
+        overflow=max(pool.overflow(), 0),
+        checkouts=pool.checkouts,
+        checkout_timeouts=pool.checkout_timeouts,
+        wait_ms_avg=pool.wait_seconds_total / pool.checkouts * 1000
+        if pool.checkouts
+        else 0.0,
+        wait_ms_max=pool.wait_seconds_max * 1000,
+        connects=pool.connects,
+        closes=pool.closes,
+        invalidations=pool.invalidations,
+    )
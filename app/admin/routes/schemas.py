@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+
+
+class MemberCacheStatsResponse(BaseModel):
+    size: int
+    max_size: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+    hit_ratio: float
+
+
+class PoolStatsResponse(BaseModel):
+    pool_size: int
+    max_overflow: int
+    timeout_seconds: float
+    recycle_seconds: int
+    pre_ping: bool
+    statement_cache_size: int
+    checked_out: int
+    checked_in: int
+    overflow: int
+    checkouts: int
+    checkout_timeouts: int
+    wait_ms_avg: float
+    wait_ms_max: float
+    connects: int
+    closes: int
+    invalidations: int
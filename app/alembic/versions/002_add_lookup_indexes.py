@@ -0,0 +1,64 @@
+"""Add indexes for the list, arrivals and sign in/out lookups.
+
+Revision ID: 002
+Revises: 001
+Create Date: 2025-07-08 19:42:11.503128
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "002"
+down_revision: Union[str, None] = "001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LIVE = sa.text("deleted_at IS NULL")
+OPEN = sa.text("departure_at IS NULL AND deleted_at IS NULL")
+
+# (name, table, columns, partial index predicate)
+INDEXES = [
+    # Keyset pagination of the list endpoints.
+    ("ix_users_created_at_id_live", "users", ["created_at", "id"], LIVE),
+    ("ix_form211_created_at_id_live", "form211", ["created_at", "id"], LIVE),
+    ("ix_timelog_created_at_id_live", "timelog", ["created_at", "id"], LIVE),
+    # Member lookups by SAR ID on sign in and sign out.
+    ("ix_users_sar_id_live", "users", ["sar_id"], LIVE),
+    # The arrivals board of a form 211.
+    (
+        "ix_timelog_form211_id_arrival_at_live",
+        "timelog",
+        ["form211_id", "arrival_at", "id"],
+        LIVE,
+    ),
+    # The open entry of a member on sign out.
+    ("ix_timelog_form211_id_sar_id_open", "timelog", ["form211_id", "sar_id"], OPEN),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY can not run inside a transaction, but it does not
+    # lock out writes so the migration can be run during an incident.
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_where=where,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table, postgresql_concurrently=True, if_exists=True
+            )
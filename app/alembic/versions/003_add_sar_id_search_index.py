@@ -0,0 +1,53 @@
+"""Add a trigram index for SAR ID substring search.
+
+Revision ID: 003
+Revises: 002
+Create Date: 2025-07-15 18:03:52.871940
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "003"
+down_revision: Union[str, None] = "002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Exact and prefix SAR ID matches are served by ix_users_sar_id_live, only the
+    # substring matches need the trigram index. pg_trgm ships with the standard
+    # Postgres contrib modules, but if a server does not have it the search still
+    # works, it just scans the roster for the substring matches.
+    available = op.get_bind().scalar(
+        sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+    )
+    if not available:
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_users_sar_id_trgm_live",
+            "users",
+            [sa.text("CAST(sar_id AS TEXT) gin_trgm_ops")],
+            postgresql_using="gin",
+            postgresql_where=sa.text("deleted_at IS NULL"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_users_sar_id_trgm_live",
+            table_name="users",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,71 @@
+"""Add the change xid of the timelogs and an index on it by form 211.
+
+Revision ID: 004
+Revises: 003
+Create Date: 2025-07-22 20:11:37.295614
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "004"
+down_revision: Union[str, None] = "003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The id of the transaction that last wrote the row. Unlike updated_at, the
+    # start time of that transaction, it tells whether the write has committed:
+    # every transaction below the xmin of a snapshot has ended. The rows that
+    # are there already count as written long ago. A constant default does not
+    # rewrite the table.
+    op.add_column(
+        "timelog",
+        sa.Column("change_xid", sa.BigInteger(), server_default="0", nullable=False),
+    )
+    op.execute(
+        """
+        CREATE FUNCTION set_timelog_change_xid() RETURNS trigger AS $$
+        BEGIN
+            NEW.change_xid := pg_current_xact_id()::text::bigint;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER timelog_set_change_xid
+        BEFORE INSERT OR UPDATE ON timelog
+        FOR EACH ROW EXECUTE FUNCTION set_timelog_change_xid()
+        """
+    )
+
+    # Not partial: soft deleted rows have to count as changes too.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_timelog_form211_id_change_xid_id",
+            "timelog",
+            ["form211_id", "change_xid", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_timelog_form211_id_change_xid_id",
+            table_name="timelog",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.execute("DROP TRIGGER IF EXISTS timelog_set_change_xid ON timelog")
+    op.execute("DROP FUNCTION IF EXISTS set_timelog_change_xid()")
+    op.drop_column("timelog", "change_xid")
@@ -0,0 +1,74 @@
+"""Notify listeners of every timelog change.
+
+Revision ID: 005
+Revises: 004
+Create Date: 2025-07-29 19:26:03.118470
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "005"
+down_revision: Union[str, None] = "004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The payload carries the row itself so that subscribers never have to query
+    # for it. pg_notify fails on payloads of 8000 bytes or more, which would fail
+    # the write, so a row too long to fit is sent by id and subscribers read it.
+    # NOTIFY is only delivered when the writing transaction commits.
+    op.execute(
+        """
+        CREATE FUNCTION notify_timelog_change() RETURNS trigger AS $$
+        DECLARE
+            event text;
+            payload text;
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                event := 'sign_in';
+            ELSIF NEW.deleted_at IS NOT NULL AND OLD.deleted_at IS NULL THEN
+                event := 'delete';
+            ELSIF NEW.departure_at IS NOT NULL AND OLD.departure_at IS NULL THEN
+                event := 'sign_out';
+            ELSE
+                event := 'edit';
+            END IF;
+
+            payload := json_build_object(
+                'event', event,
+                'form211_id', NEW.form211_id,
+                'id', NEW.id,
+                'timelog', row_to_json(NEW)
+            )::text;
+            IF octet_length(payload) >= 8000 THEN
+                payload := json_build_object(
+                    'event', event,
+                    'form211_id', NEW.form211_id,
+                    'id', NEW.id
+                )::text;
+            END IF;
+
+            PERFORM pg_notify('timelog_changes', payload);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER timelog_notify_change
+        AFTER INSERT OR UPDATE ON timelog
+        FOR EACH ROW EXECUTE FUNCTION notify_timelog_change()
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS timelog_notify_change ON timelog")
+    op.execute("DROP FUNCTION IF EXISTS notify_timelog_change()")
@@ -0,0 +1,42 @@
+"""Add an index on the change xid of all the timelogs, for the change feed.
+
+Revision ID: 006
+Revises: 005
+Create Date: 2025-08-12 18:42:09.517302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "006"
+down_revision: Union[str, None] = "005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The feeds are ordered on (change_xid, id). The feed of a form 211 has
+    # ix_timelog_form211_id_change_xid_id from 004. Not partial: soft deleted
+    # rows are sent as tombstones.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_timelog_change_xid_id",
+            "timelog",
+            ["change_xid", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_timelog_change_xid_id",
+            table_name="timelog",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
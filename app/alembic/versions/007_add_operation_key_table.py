@@ -0,0 +1,51 @@
+"""Add the idempotency keys of the offline operations.
+
+Revision ID: 007
+Revises: 006
+Create Date: 2025-08-19 21:03:44.861027
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "operation_key",
+        sa.Column("key", sa.String(), nullable=False),
+        sa.Column("form211_id", sa.Integer(), nullable=False),
+        sa.Column("operation", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("timelog_id", sa.Integer(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["form211_id"],
+            ["form211.id"],
+            name=op.f("fk_operation_key_form211_id_form211"),
+        ),
+        sa.ForeignKeyConstraint(
+            ["timelog_id"],
+            ["timelog.id"],
+            name=op.f("fk_operation_key_timelog_id_timelog"),
+        ),
+        sa.PrimaryKeyConstraint("key", name=op.f("pk_operation_key")),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("operation_key")
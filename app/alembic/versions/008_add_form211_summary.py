@@ -0,0 +1,128 @@
+"""Keep a summary of the timelogs of every form 211 by resource type.
+
+Revision ID: 008
+Revises: 007
+Create Date: 2025-08-26 20:17:52.930418
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "008"
+down_revision: Union[str, None] = "007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# What a timelog row adds to the counts of its form 211 and resource type.
+ON_SCENE = "(deleted_at IS NULL AND departure_at IS NULL)::int"
+ENTRIES = "(deleted_at IS NULL)::int"
+
+NEW_ROWS = f"""
+    SELECT form211_id, resource_type, {ON_SCENE} AS on_scene, {ENTRIES} AS entries
+    FROM new_rows
+"""
+OLD_ROWS = f"""
+    SELECT form211_id, resource_type, -{ON_SCENE} AS on_scene, -{ENTRIES} AS entries
+    FROM old_rows
+"""
+
+TRIGGERS = {
+    "INSERT": "NEW TABLE AS new_rows",
+    "UPDATE": "OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    "DELETE": "OLD TABLE AS old_rows",
+}
+
+
+def apply_changes(changes: str) -> str:
+    # Changes that add up to nothing (a renamed entry) leave the summary alone,
+    # and the rows are locked in key order so that two writers cannot deadlock.
+    return f"""
+        INSERT INTO form211_summary AS summary
+            (form211_id, resource_type, on_scene, entries)
+        SELECT form211_id, resource_type, sum(on_scene), sum(entries)
+        FROM ({changes}) AS changes
+        GROUP BY form211_id, resource_type
+        HAVING sum(on_scene) <> 0 OR sum(entries) <> 0
+        ORDER BY form211_id, resource_type
+        ON CONFLICT (form211_id, resource_type) DO UPDATE
+        SET on_scene = summary.on_scene + excluded.on_scene,
+            entries = summary.entries + excluded.entries,
+            updated_at = now();
+    """
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "form211_summary",
+        sa.Column("form211_id", sa.Integer(), nullable=False),
+        sa.Column("resource_type", sa.String(), nullable=False),
+        sa.Column("on_scene", sa.Integer(), nullable=False),
+        sa.Column("entries", sa.Integer(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["form211_id"],
+            ["form211.id"],
+            name=op.f("fk_form211_summary_form211_id_form211"),
+        ),
+        sa.PrimaryKeyConstraint(
+            "form211_id", "resource_type", name=op.f("pk_form211_summary")
+        ),
+    )
+
+    # Statement level triggers see all the rows a statement changed at once in
+    # their transition tables, so a bulk sign in or a demobilization updates
+    # each summary row once. They run in the writing transaction.
+    op.execute(
+        f"""
+        CREATE FUNCTION maintain_form211_summary() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                {apply_changes(NEW_ROWS)}
+            ELSIF TG_OP = 'UPDATE' THEN
+                {apply_changes(NEW_ROWS + "UNION ALL" + OLD_ROWS)}
+            ELSE
+                {apply_changes(OLD_ROWS)}
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    # A trigger with transition tables can only fire on one event.
+    for event, referencing in TRIGGERS.items():
+        op.execute(
+            f"""
+            CREATE TRIGGER timelog_summary_{event.lower()}
+            AFTER {event} ON timelog
+            REFERENCING {referencing}
+            FOR EACH STATEMENT EXECUTE FUNCTION maintain_form211_summary()
+            """
+        )
+
+    # The timelog is locked by the triggers until the migration commits, so
+    # no change can slip in between.
+    op.execute(
+        f"""
+        INSERT INTO form211_summary (form211_id, resource_type, on_scene, entries)
+        SELECT form211_id, resource_type, sum({ON_SCENE}), sum({ENTRIES})
+        FROM timelog
+        GROUP BY form211_id, resource_type
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for event in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS timelog_summary_{event.lower()} ON timelog")
+    op.execute("DROP FUNCTION IF EXISTS maintain_form211_summary()")
+    op.drop_table("form211_summary")
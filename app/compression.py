@@ -0,0 +1,237 @@
+"""Compress responses with the best encoding the client accepts.
+
+The JSON lists and exports are very repetitive and the tablets are often on a
+cellular or satellite link, so text responses of COMPRESSION_MIN_SIZE bytes or
+more are compressed with brotli, zstd or gzip, whichever the Accept-Encoding
+header prefers (brotli and zstd only when their packages are installed).
+Streamed responses such as the exports are compressed chunk by chunk and flushed
+after each one, so the download still starts at once. Event streams are left
+alone, compressing them would hold events back.
+
+A compressed body is a different representation of the resource, so to a client
+that accepts an encoding the ETag of a compressible response is sent weak, on
+the 200 (compressed or not) and on its 304s alike.
+
+Compressing is CPU work, bodies and chunks of COMPRESSION_THREAD_MIN_SIZE bytes
+or more are compressed in a worker thread so they do not stall the event loop.
+"""
+import zlib
+from typing import Callable, Iterable
+
+import anyio
+import settings
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+UNCOMPRESSIBLE_TYPES = ("text/event-stream",)
+
+
+class _Gzip:
+    def __init__(self) -> None:
+        self._compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, wbits=31)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class _Brotli:
+    def __init__(self) -> None:
+        self._compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_LEVEL)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+class _Zstd:
+    def __init__(self) -> None:
+        self._compressor = zstandard.ZstdCompressor(
+            level=settings.COMPRESSION_ZSTD_LEVEL
+        ).compressobj()
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+# In order of preference when the client accepts several equally.
+ENCODINGS: dict[str, Callable[[], _Gzip | _Brotli | _Zstd]] = {}
+if brotli is not None:
+    ENCODINGS["br"] = _Brotli
+if zstandard is not None:
+    ENCODINGS["zstd"] = _Zstd
+ENCODINGS["gzip"] = _Gzip
+
+
+def negotiate(accept_encoding: str, available: Iterable[str] = ENCODINGS) -> str | None:
+    """The encoding to use for an Accept-Encoding header, None for identity.
+
+    available is in order of preference, it defaults to the encodings we can
+    compress with.
+    """
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[coding.strip().lower()] = quality
+
+    wildcard = weights.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in available:
+        quality = weights.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+
+    return best
+
+
+async def _run(compress: Callable[[bytes], bytes], data: bytes) -> bytes:
+    if len(data) >= settings.COMPRESSION_THREAD_MIN_SIZE:
+        return await anyio.to_thread.run_sync(compress, data)
+
+    return compress(data)
+
+
+def _weaken_etag(headers: MutableHeaders) -> None:
+    # The compressed body is a different representation of the resource
+    etag = headers.get("etag")
+    if etag is not None and not etag.startswith("W/"):
+        headers["ETag"] = f"W/{etag}"
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Message | None = None
+        compressor: _Gzip | _Brotli | _Zstd | None = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                if message["status"] == 304:
+                    # The 304 stands for the 200 this request would have got,
+                    # which has the weak ETag, so it sends the same validator.
+                    passthrough = True
+                    headers = MutableHeaders(scope=message)
+                    headers.add_vary_header("Accept-Encoding")
+                    _weaken_etag(headers)
+                    await send(message)
+                    return
+
+                start_message = message
+                return
+
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] != "http.response.body":
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is not None:
+                compress = compressor.chunk if more_body else compressor.finish
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": await _run(compress, body),
+                        "more_body": more_body,
+                    }
+                )
+                return
+
+            # The first body message decides for the whole response
+            headers = MutableHeaders(scope=start_message)
+            content_type = headers.get("content-type", "")
+            if (
+                "content-encoding" in headers
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+                or content_type.startswith(UNCOMPRESSIBLE_TYPES)
+                or (not more_body and len(body) < settings.COMPRESSION_MIN_SIZE)
+            ):
+                passthrough = True
+                if content_type.startswith(COMPRESSIBLE_TYPES):
+                    headers.add_vary_header("Accept-Encoding")
+                    # Too small this time, but it has the validator of the
+                    # compressed representation, as its 304s do.
+                    _weaken_etag(headers)
+                await send(start_message)
+                await send(message)
+                return
+
+            headers["Content-Encoding"] = encoding
+            headers.add_vary_header("Accept-Encoding")
+            _weaken_etag(headers)
+
+            compressor = ENCODINGS[encoding]()
+            if not more_body:
+                body = await _run(compressor.finish, body)
+                headers["Content-Length"] = str(len(body))
+                await send(start_message)
+                await send({"type": "http.response.body", "body": body})
+                return
+
+            if "content-length" in headers:
+                del headers["Content-Length"]
+            await send(start_message)
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": await _run(compressor.chunk, body),
+                    "more_body": True,
+                }
+            )
+
+        await self.app(scope, receive, send_compressed)
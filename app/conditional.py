@@ -0,0 +1,42 @@
+"""ETag / If-None-Match support for the resources that are polled.
+
+A route computes a cheap validator for its resource, such as the newest
+updated_at of the rows it would return, before running the full query. When the
+client already has the representation for that validator it gets a 304 with no
+body and the full query is never run.
+"""
+import hashlib
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts: object) -> str:
+    """Build a strong ETag from the parts of a validator."""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Check whether the If-None-Match header of a request matches an ETag."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored.
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"}
+    )
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    # Let clients cache the body but revalidate it on every request.
+    response.headers["Cache-Control"] = "no-cache"
@@ -2,6 +2,7 @@ import datetime
 from typing import AsyncGenerator
 
 import settings
+from pool import InstrumentedPool
 from sqlalchemy import DateTime, MetaData
 from sqlalchemy.ext.asyncio import (
     AsyncAttrs,
@@ -14,7 +15,16 @@ from sqlalchemy.orm import DeclarativeBase
 engine = create_async_engine(
     settings.SQLALCHEMY_DATABASE_URL,
     echo=settings.SQLALCHEMY_ECHO,
-    connect_args={"ssl": False},
+    poolclass=InstrumentedPool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    connect_args={
+        "ssl": False,
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+    },
 )
 
 
@@ -0,0 +1,163 @@
+"""Live timelog events of a Form 211, pushed from Postgres LISTEN/NOTIFY.
+
+A trigger on the timelog table (see migration 005) sends every insert and update
+to the timelog_changes channel once its transaction commits. Each worker keeps a
+single LISTEN connection to Postgres and fans the notifications out to the
+subscribers of the Form 211 they belong to, so a room full of dashboards costs
+one database connection instead of one poll per tablet every few seconds.
+
+The notification carries the row, except for a row too long for a NOTIFY
+payload, which comes by id and is read back before it is pushed. That read
+returns the row as last committed, so the event may carry a later state than
+the change that sent it, never an older one.
+
+A subscriber that falls too far behind, or whose events were lost because the
+LISTEN connection dropped, is marked lagged and should refetch the arrivals
+before subscribing again.
+"""
+import asyncio
+import json
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, NamedTuple
+
+import asyncpg
+import settings
+from db import engine
+from sqlalchemy import text
+
+CHANNEL = "timelog_changes"
+SUBSCRIBER_QUEUE_SIZE = 256
+
+
+class TimelogEvent(NamedTuple):
+    event: str
+    data: str
+
+
+class Subscription:
+    def __init__(self) -> None:
+        self.queue: asyncio.Queue[TimelogEvent] = asyncio.Queue(
+            maxsize=SUBSCRIBER_QUEUE_SIZE
+        )
+        self.lagged = asyncio.Event()
+
+    def push(self, event: TimelogEvent) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.lagged.set()
+
+    async def get(self) -> TimelogEvent | None:
+        """Wait for the next event, None once the subscription has lagged."""
+        if self.lagged.is_set():
+            return None
+
+        get = asyncio.ensure_future(self.queue.get())
+        lagged = asyncio.ensure_future(self.lagged.wait())
+        try:
+            await asyncio.wait({get, lagged}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            get.cancel()
+            lagged.cancel()
+
+        if self.lagged.is_set() or get.cancelled():
+            return None
+        return get.result()
+
+
+class TimelogEventHub:
+    def __init__(self) -> None:
+        self._connection: asyncpg.Connection | None = None
+        self._lock = asyncio.Lock()
+        self._subscriptions: defaultdict[int, set[Subscription]] = defaultdict(set)
+        self._fetches: set[asyncio.Task] = set()
+
+    async def _listen(self) -> None:
+        async with self._lock:
+            if self._connection is not None and not self._connection.is_closed():
+                return
+
+            connection = await asyncpg.connect(
+                host=settings.PG_HOST,
+                port=int(settings.PG_PORT),
+                user=settings.PG_USER,
+                password=settings.PG_PASSWORD,
+                database=settings.PG_DB,
+                ssl=False,
+            )
+            connection.add_termination_listener(self._on_termination)
+            await connection.add_listener(CHANNEL, self._on_notification)
+            self._connection = connection
+
+    def _on_notification(
+        self, connection: asyncpg.Connection, pid: int, channel: str, payload: str
+    ) -> None:
+        message = json.loads(payload)
+        subscriptions = self._subscriptions.get(message["form211_id"])
+        if not subscriptions:
+            return
+
+        if "timelog" not in message:
+            fetch = asyncio.create_task(self._fetch_and_push(message))
+            self._fetches.add(fetch)
+            fetch.add_done_callback(self._fetches.discard)
+            return
+
+        self._push(message, json.dumps(message["timelog"]))
+
+    async def _fetch_and_push(self, message: dict) -> None:
+        async with engine.connect() as conn:
+            data = (
+                await conn.execute(
+                    text(
+                        "SELECT row_to_json(timelog)::text FROM timelog WHERE id = :id"
+                    ),
+                    {"id": message["id"]},
+                )
+            ).scalar()
+        if data is not None:
+            self._push(message, data)
+
+    def _push(self, message: dict, data: str) -> None:
+        event = TimelogEvent(message["event"], data)
+        for subscription in self._subscriptions.get(message["form211_id"], ()):
+            subscription.push(event)
+
+    def _on_termination(self, connection: asyncpg.Connection) -> None:
+        # Whatever was sent while the connection was down is lost, the next
+        # subscriber reconnects.
+        if connection is self._connection:
+            self._connection = None
+        for subscriptions in self._subscriptions.values():
+            for subscription in subscriptions:
+                subscription.lagged.set()
+
+    @asynccontextmanager
+    async def subscribe(self, form211_id: int) -> AsyncIterator[Subscription]:
+        """Subscribe to the events of a Form 211 for the duration of the block.
+
+        Events are only delivered once this has entered, so clients should fetch
+        the arrivals after subscribing, not before.
+        """
+        await self._listen()
+        subscription = Subscription()
+        self._subscriptions[form211_id].add(subscription)
+        try:
+            yield subscription
+        finally:
+            subscriptions = self._subscriptions[form211_id]
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[form211_id]
+
+    async def close(self) -> None:
+        for fetch in self._fetches:
+            fetch.cancel()
+        async with self._lock:
+            connection, self._connection = self._connection, None
+            if connection is not None and not connection.is_closed():
+                await connection.close()
+
+
+timelog_events = TimelogEventHub()
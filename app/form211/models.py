@@ -1,13 +1,21 @@
 from datetime import datetime
 
 from db import Base
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import ForeignKey, Index, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 
 class Form211(Base):
     __tablename__ = "form211"
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        Index(
+            "ix_form211_created_at_id_live",
+            "created_at",
+            "id",
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
+        {"extend_existing": True},
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     created_by: Mapped[int] = mapped_column(ForeignKey("users.id"))
@@ -27,3 +35,49 @@ class Form211(Base):
 
     def __repr__(self) -> str:
         return f"Form211(id={self.id})"
+
+
+class OperationKey(Base):
+    """The idempotency key of an offline operation applied to a form 211.
+
+    The key is inserted before the operation is applied, in the same
+    transaction, so a retried upload finds it and gets the stored result back.
+    """
+
+    __tablename__ = "operation_key"
+
+    key: Mapped[str] = mapped_column(primary_key=True)
+    form211_id: Mapped[int] = mapped_column(ForeignKey("form211.id"))
+    operation: Mapped[str] = mapped_column(nullable=False)
+    status: Mapped[str | None] = mapped_column(nullable=True)
+    timelog_id: Mapped[int | None] = mapped_column(
+        ForeignKey("timelog.id"), nullable=True
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        server_default=func.now(), nullable=False
+    )
+
+    def __repr__(self) -> str:
+        return f"OperationKey(key={self.key!r})"
+
+
+class Form211Summary(Base):
+    """The counts of the timelogs of a form 211 for one resource type.
+
+    Kept up to date by triggers on the timelog table, see migration 008.
+    """
+
+    __tablename__ = "form211_summary"
+
+    form211_id: Mapped[int] = mapped_column(ForeignKey("form211.id"), primary_key=True)
+    resource_type: Mapped[str] = mapped_column(primary_key=True)
+    # Signed in and not signed out
+    on_scene: Mapped[int] = mapped_column(nullable=False)
+    # Every entry that is not deleted
+    entries: Mapped[int] = mapped_column(nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        server_default=func.now(), nullable=False
+    )
+
+    def __repr__(self) -> str:
+        return f"Form211Summary(form211_id={self.form211_id})"
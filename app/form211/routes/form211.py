@@ -1,31 +1,111 @@
-from typing import Annotated
+import asyncio
+import csv
+import io
+import json
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Annotated, AsyncIterator, Literal
 
-from db import get_async_db_session
-from fastapi import APIRouter, Depends, HTTPException
+from conditional import is_not_modified, make_etag, not_modified, set_etag
+from db import async_session_maker, get_async_db_session
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from form211 import models
+from form211.events import timelog_events
 from form211.routes import schemas
-from sqlalchemy import func, select
+from metrics import query_budget
+from pagination import (
+    DEFAULT_LIMIT,
+    After,
+    Count,
+    CountMode,
+    Limit,
+    Since,
+    get_count,
+    next_changes,
+    next_page,
+    paginate,
+    paginate_changes,
+)
+from serialization import json_response, row_items
+from sqlalchemy import (
+    CTE,
+    Boolean,
+    DateTime,
+    Integer,
+    Select,
+    String,
+    Text,
+    bindparam,
+    case,
+    cast,
+    column,
+    exists,
+    func,
+    insert,
+    literal,
+    select,
+    true,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from timelog.models import Timelog as timelog_models
-from user import models as user_models
+from user.cache import get_member_ids
+from user.models import User as user_models
 
-# /api/v1/user
+# /api/v1/211
 router = APIRouter()
 
+BULK_SIGN_IN_MAX = 500
+OPERATIONS_MAX = 500
+EXPORT_CHUNK_SIZE = 1000
+# Seconds between comments on an idle event stream, so proxies keep it open.
+EVENTS_KEEPALIVE_SECONDS = 15
+
+# The columns of the person-hours report for each group_by option
+HOURS_GROUPS = {
+    "person": (timelog_models.sar_id, timelog_models.name),
+    "resource_type": (timelog_models.resource_type,),
+}
+
+# The check in columns of the ICS 211 that we have data for, in form order.
+ICS211_COLUMNS = (
+    "List #",
+    "Kind",
+    "Resource Name or Identifier",
+    "SAR ID",
+    "Date/Time Check-In",
+    "Total # of Personnel",
+    "Date/Time Check-Out",
+)
+
 
 @router.post("", summary="Create a new form 211")
 async def post_create_form211(
     db: Annotated[AsyncSession, Depends(get_async_db_session)],
     request_data: schemas.CreateForm211Request,
 ) -> schemas.CreateForm211Response:
-    form211 = models.Form211(
-        name=request_data.name,
-        created_by=request_data.created_by,
-        operational_period=request_data.operational_period,
+    stmt = (
+        insert(models.Form211)
+        .values(
+            name=request_data.name,
+            created_by=request_data.created_by,
+            operational_period=request_data.operational_period,
+        )
+        .returning(
+            models.Form211.id,
+            models.Form211.created_by,
+            models.Form211.name,
+            models.Form211.operational_period,
+            models.Form211.created_at,
+            models.Form211.updated_at,
+            models.Form211.closed_at,
+        )
     )
-    db.add(form211)
+    form211 = (await db.execute(stmt)).one()
     await db.commit()
-    await db.refresh(form211)
 
     return schemas.CreateForm211Response(
         id=form211.id,
@@ -41,6 +121,8 @@ async def post_create_form211(
 @router.get("/{form211_id}", summary="Retrieve a form 211")
 async def get_form211(
     db: Annotated[AsyncSession, Depends(get_async_db_session)],
+    request: Request,
+    response: Response,
     form211_id: int,
 ) -> schemas.RetrieveForm211Response:
     stmt = select(
@@ -58,6 +140,11 @@ async def get_form211(
         raise HTTPException(status_code=404, detail="Form 211 not found")
 
     mapped_row = result_row._mapping
+    etag = make_etag("form211", form211_id, mapped_row[models.Form211.updated_at])
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
+    set_etag(response, etag)
     return schemas.RetrieveForm211Response(
         id=mapped_row[models.Form211.id],
         created_by=mapped_row[models.Form211.created_by],
@@ -69,45 +156,40 @@ async def get_form211(
     )
 
 
-@router.get("", summary="List all Form 211")
+@router.get("", summary="List all Form 211", response_model=schemas.ListForm211Response)
 async def get_form211s(
-    db: Annotated[AsyncSession, Depends(get_async_db_session)]
-) -> schemas.ListForm211Response:
-    count_stmt = select(func.count(models.Form211.id)).where(
-        models.Form211.deleted_at.is_(None)
-    )
-    count_result = (await db.execute(count_stmt)).scalar() or 0
-
-    stmt = (
-        select(
-            models.Form211.id,
-            models.Form211.created_by,
-            models.Form211.name,
-            models.Form211.operational_period,
-            models.Form211.created_at,
-            models.Form211.updated_at,
-            models.Form211.closed_at,
-        )
-        .where(models.Form211.deleted_at.is_(None))
-        .order_by(models.Form211.created_at.desc())
+    db: Annotated[AsyncSession, Depends(get_async_db_session)],
+    limit: Limit = DEFAULT_LIMIT,
+    after: After = None,
+    count: Count = CountMode.exact,
+) -> Response:
+    stmt = select(
+        models.Form211.id,
+        models.Form211.created_by,
+        models.Form211.name,
+        models.Form211.operational_period,
+        models.Form211.created_at,
+        models.Form211.updated_at,
+        models.Form211.closed_at,
+    ).where(models.Form211.deleted_at.is_(None))
+    page_stmt = paginate(
+        stmt,
+        models.Form211.created_at,
+        models.Form211.id,
+        limit,
+        after,
     )
 
-    result_rows = (await db.execute(stmt)).all()
+    result_rows, next_cursor = next_page((await db.execute(page_stmt)).all(), limit)
+    count_result = await get_count(db, count, stmt, after)
 
-    return schemas.ListForm211Response(
-        count=count_result,
-        items=[
-            schemas.ListForm211ResponseItem(
-                id=row.id,
-                created_by=row.created_by,
-                name=row.name,
-                operational_period=row.operational_period,
-                created_at=row.created_at,
-                updated_at=row.updated_at,
-                closed_at=row.closed_at,
-            )
-            for row in result_rows
-        ],
+    return json_response(
+        {
+            "count": count_result,
+            "count_mode": count,
+            "items": row_items(schemas.ListForm211ResponseItem, result_rows),
+            "next_cursor": next_cursor,
+        }
     )
 
 
@@ -117,18 +199,27 @@ async def put_211(
     form211_id: int,
     request_data: schemas.UpdateForm211Request,
 ) -> schemas.UpdateForm211Response:
-    stmt = select(models.Form211).where(
-        models.Form211.id == form211_id, models.Form211.deleted_at.is_(None)
+    stmt = (
+        update(models.Form211)
+        .where(models.Form211.id == form211_id, models.Form211.deleted_at.is_(None))
+        .values(name=request_data.name)
+        .returning(
+            models.Form211.id,
+            models.Form211.created_by,
+            models.Form211.name,
+            models.Form211.operational_period,
+            models.Form211.created_at,
+            models.Form211.updated_at,
+            models.Form211.closed_at,
+        )
+        .execution_options(synchronize_session=False)
     )
 
-    form211 = (await db.execute(stmt)).scalar()
+    form211 = (await db.execute(stmt)).first()
     if form211 is None:
         raise HTTPException(status_code=404, detail="Form 211 not found")
 
-    form211.name = request_data.name
-
     await db.commit()
-    await db.refresh(form211)
 
     return schemas.UpdateForm211Response(
         id=form211.id,
@@ -146,63 +237,77 @@ async def delete_form211(
     db: Annotated[AsyncSession, Depends(get_async_db_session)],
     form211_id: int,
 ) -> None:
-    stmt = select(models.Form211).where(
-        models.Form211.id == form211_id,
-        models.Form211.deleted_at.is_(None),
+    stmt = (
+        update(models.Form211)
+        .where(models.Form211.id == form211_id, models.Form211.deleted_at.is_(None))
+        .values(deleted_at=func.now())
+        .returning(models.Form211.id)
+        .execution_options(synchronize_session=False)
     )
 
-    form211 = (await db.execute(stmt)).scalar()
-
-    if form211 is None:
+    if (await db.execute(stmt)).first() is None:
         raise HTTPException(status_code=404, detail="From 211 not found")
 
-    form211.deleted_at = func.now()
     await db.commit()
-    await db.refresh(form211)
     return None
 
 
+def _active_form211(form211_id: int) -> CTE:
+    return (
+        select(models.Form211.id)
+        .where(models.Form211.id == form211_id, models.Form211.deleted_at.is_(None))
+        .cte("active_form211")
+    )
+
+
 @router.post("/{form211_id}/sign_in", summary="Sign in to a Form 211")
+@query_budget(1)
 async def post_sign_in_form211(
     db: Annotated[AsyncSession, Depends(get_async_db_session)],
     form211_id: int,
     request_data: schemas.SignInForm211Request,
 ) -> schemas.SignInForm211Response:
-    # Check that we are loading an active
-    stmt = select(models.Form211).where(
-        models.Form211.id == form211_id,
-        models.Form211.deleted_at.is_(None),
+    # Check the form, find the member of the FSAR ID and insert the entry in one
+    # statement. Without an active form nothing is inserted, and a sar id that
+    # no member has signs in a guest with sar id 0.
+    active_form211 = _active_form211(form211_id)
+    member = (
+        select(user_models.sar_id)
+        .where(
+            user_models.sar_id == request_data.sar_id,
+            user_models.deleted_at.is_(None),
+        )
+        .limit(1)
+        .cte("member")
     )
-
-    form211 = (await db.execute(stmt)).scalar()
-
-    if form211 is None:
-        raise HTTPException(status_code=404, detail="Form 211 not found")
-
-    # See if we can find a user based on the FSAR ID
-    sar_id = request_data.sar_id
-    if sar_id is not None:
-        stmt = select(user_models.User).where(
-            user_models.User.sar_id == sar_id,
-            user_models.User.deleted_at.is_(None),
+    stmt = (
+        insert(timelog_models)
+        .from_select(
+            ["form211_id", "name", "sar_id", "resource_type", "created_by"],
+            select(
+                active_form211.c.id,
+                literal(request_data.name),  # Name is required in the schema
+                func.coalesce(member.c.sar_id, 0),
+                literal("FSAR"),
+                literal(request_data.created_by),
+            ).outerjoin_from(active_form211, member, true()),
+        )
+        .returning(
+            timelog_models.id,
+            timelog_models.form211_id,
+            timelog_models.created_by,
+            timelog_models.sar_id,
+            timelog_models.name,
+            timelog_models.resource_type,
+            timelog_models.arrival_at,
+            timelog_models.departure_at,
         )
-        user = (await db.execute(stmt)).scalar()
-
-        if user is None:
-            sar_id = 0
-
-    timelog = timelog_models(
-        form211_id=form211.id,
-        name=request_data.name,  # Name is required in the schema
-        sar_id=sar_id or 0,
-        resource_type="FSAR",
-        created_by=request_data.created_by,
-        departure_at=None,  # Start with empty departure time
     )
+    timelog = (await db.execute(stmt)).first()
+    if timelog is None:
+        raise HTTPException(status_code=404, detail="Form 211 not found")
 
-    db.add(timelog)
     await db.commit()
-    await db.refresh(timelog)
 
     return schemas.SignInForm211Response(
         id=timelog.id,
@@ -216,48 +321,421 @@ async def post_sign_in_form211(
     )
 
 
-@router.put("/{form211_id}/sign_out/{sar_id}", summary="Sign out to a Form 211")
-async def put_sign_out_form211(
+@router.post("/{form211_id}/sign_in/bulk", summary="Sign in a group to a Form 211")
+@query_budget(3)
+async def post_bulk_sign_in_form211(
     db: Annotated[AsyncSession, Depends(get_async_db_session)],
     form211_id: int,
-    sar_id: int,
-) -> schemas.SignOutForm211Response:
+    request_data: Annotated[
+        list[schemas.SignInForm211Request],
+        Body(min_length=1, max_length=BULK_SIGN_IN_MAX),
+    ],
+) -> schemas.BulkSignInForm211Response:
     # Check that we are loading an active
-    stmt = select(models.Form211).where(
+    stmt = select(models.Form211.id).where(
         models.Form211.id == form211_id,
         models.Form211.deleted_at.is_(None),
     )
 
-    form211 = (await db.execute(stmt)).scalar()
+    if (await db.execute(stmt)).scalar() is None:
+        raise HTTPException(status_code=404, detail="Form 211 not found")
+
+    # Find every FSAR ID of the group that belongs to a user in one query
+    member_ids = await get_member_ids(db, [item.sar_id for item in request_data])
+    member_sar_ids = {
+        sar_id for sar_id, user_id in member_ids.items() if user_id is not None
+    }
 
-    if form211 is None:
+    statuses = []
+    new_timelogs = []
+    signed_in_sar_ids = set()
+    for item in request_data:
+        if item.sar_id not in member_sar_ids:
+            statuses.append("guest")
+        elif item.sar_id in signed_in_sar_ids:
+            statuses.append("duplicate")
+            continue
+        else:
+            statuses.append("signed_in")
+            signed_in_sar_ids.add(item.sar_id)
+
+        new_timelogs.append(
+            {
+                "form211_id": form211_id,
+                "name": item.name,
+                "sar_id": item.sar_id if item.sar_id in member_sar_ids else 0,
+                "resource_type": "FSAR",
+                "created_by": item.created_by,
+                "departure_at": None,
+            }
+        )
+
+    # All the rows go in one multi-row INSERT, returned in the order given.
+    stmt = insert(timelog_models).returning(
+        timelog_models.id,
+        timelog_models.form211_id,
+        timelog_models.created_by,
+        timelog_models.sar_id,
+        timelog_models.name,
+        timelog_models.resource_type,
+        timelog_models.arrival_at,
+        timelog_models.departure_at,
+        sort_by_parameter_order=True,
+    )
+    created_rows = iter((await db.execute(stmt, new_timelogs)).all())
+    await db.commit()
+
+    items = []
+    for status in statuses:
+        if status == "duplicate":
+            items.append(schemas.BulkSignInForm211ResponseItem(status=status))
+            continue
+
+        row = next(created_rows)
+        items.append(
+            schemas.BulkSignInForm211ResponseItem(
+                status=status,
+                timelog=schemas.SignInForm211Response(
+                    id=row.id,
+                    form211_id=row.form211_id,
+                    created_by=row.created_by,
+                    sar_id=row.sar_id,
+                    name=row.name,
+                    resource_type=row.resource_type,
+                    arrival_at=row.arrival_at,
+                    departure_at=row.departure_at,
+                ),
+            )
+        )
+
+    return schemas.BulkSignInForm211Response(count=len(new_timelogs), items=items)
+
+
+def _operation_timelog(row) -> schemas.SignInForm211Response:
+    return schemas.SignInForm211Response(
+        id=row.id,
+        form211_id=row.form211_id,
+        created_by=row.created_by,
+        sar_id=row.sar_id,
+        name=row.name,
+        resource_type=row.resource_type,
+        arrival_at=row.arrival_at,
+        departure_at=row.departure_at,
+    )
+
+
+@router.post(
+    "/{form211_id}/operations",
+    summary="Apply a log of offline sign ins and sign outs to a Form 211",
+)
+@query_budget(8)
+async def post_operations_form211(
+    db: Annotated[AsyncSession, Depends(get_async_db_session)],
+    form211_id: int,
+    request_data: Annotated[
+        list[schemas.Operation],
+        Body(min_length=1, max_length=OPERATIONS_MAX),
+    ],
+) -> schemas.ApplyOperationsForm211Response:
+    # Check that we are loading an active
+    stmt = select(models.Form211.id).where(
+        models.Form211.id == form211_id,
+        models.Form211.deleted_at.is_(None),
+    )
+
+    if (await db.execute(stmt)).scalar() is None:
         raise HTTPException(status_code=404, detail="Form 211 not found")
 
-    # See if we can find a user based on the FSAR ID
-    stmt = select(user_models.User).where(
-        user_models.User.sar_id == sar_id,
-        user_models.User.deleted_at.is_(None),
+    # Claim the keys before applying anything. An upload of the same keys
+    # running at the same time waits on the primary key until this transaction
+    # ends, then finds them taken.
+    first_operations = {}
+    for operation in request_data:
+        first_operations.setdefault(operation.key, operation)
+
+    stmt = (
+        pg_insert(models.OperationKey)
+        .on_conflict_do_nothing(index_elements=[models.OperationKey.key])
+        .returning(models.OperationKey.key)
     )
-    user = (await db.execute(stmt)).scalar()
+    key_rows = [
+        {"key": key, "form211_id": form211_id, "operation": operation.operation}
+        for key, operation in first_operations.items()
+    ]
+    claimed_keys = set((await db.execute(stmt, key_rows)).scalars().all())
 
-    if user is None:
-        raise HTTPException(status_code=404, detail="SAR ID not found")
+    # The stored results of the keys applied by an earlier upload
+    previous_results = {}
+    if len(claimed_keys) < len(first_operations):
+        stmt = (
+            select(
+                models.OperationKey.key,
+                models.OperationKey.status,
+                timelog_models.id,
+                timelog_models.form211_id,
+                timelog_models.created_by,
+                timelog_models.sar_id,
+                timelog_models.name,
+                timelog_models.resource_type,
+                timelog_models.arrival_at,
+                timelog_models.departure_at,
+            )
+            .outerjoin(
+                timelog_models, timelog_models.id == models.OperationKey.timelog_id
+            )
+            .where(models.OperationKey.key.in_(first_operations.keys() - claimed_keys))
+        )
+        previous_results = {row.key: row for row in (await db.execute(stmt)).all()}
+
+    operations = [
+        operation for key, operation in first_operations.items() if key in claimed_keys
+    ]
+    member_ids = {}
+    if operations:
+        member_ids = await get_member_ids(
+            db, [operation.sar_id for operation in operations]
+        )
+
+    # The open entries of the members signed out, oldest first, which the
+    # operations sign out in order. Entries signed in by the upload join them.
+    open_entries: defaultdict[int, deque] = defaultdict(deque)
+    sign_out_sar_ids = {
+        operation.sar_id
+        for operation in operations
+        if operation.operation == "sign_out" and member_ids[operation.sar_id]
+    }
+    if sign_out_sar_ids:
+        stmt = (
+            select(timelog_models.id, timelog_models.sar_id)
+            .where(
+                timelog_models.form211_id == form211_id,
+                timelog_models.sar_id.in_(sign_out_sar_ids),
+                timelog_models.departure_at.is_(None),
+                timelog_models.deleted_at.is_(None),
+            )
+            .order_by(timelog_models.arrival_at, timelog_models.id)
+        )
+        for row in (await db.execute(stmt)).all():
+            open_entries[row.sar_id].append(("open", row.id))
 
-    # find the timelog entry that is not already signed out.
-    stmt = select(timelog_models).where(
-        timelog_models.form211_id == form211_id,
-        timelog_models.sar_id == sar_id,
-        timelog_models.departure_at.is_(None),
-        timelog_models.deleted_at.is_(None),
+    # Replay the log in memory, the writes then go in one INSERT and one UPDATE.
+    # A result is a status and its entry: ("new", index) of a signed in entry
+    # or ("open", id) of an entry that was open before.
+    results = {}
+    new_timelogs = []
+    departures = {}
+    for operation in operations:
+        is_member = member_ids[operation.sar_id] is not None
+        if operation.operation == "sign_in":
+            entry = ("new", len(new_timelogs))
+            new_timelogs.append(
+                {
+                    "form211_id": form211_id,
+                    "name": operation.name,
+                    "sar_id": operation.sar_id if is_member else 0,
+                    "resource_type": "FSAR",
+                    "created_by": operation.created_by,
+                    "arrived_at": operation.at,
+                    "signed_out": False,
+                    "departed_at": None,
+                }
+            )
+            if is_member:
+                open_entries[operation.sar_id].append(entry)
+            results[operation.key] = ("signed_in" if is_member else "guest", entry)
+        elif not is_member:
+            results[operation.key] = ("not_member", None)
+        elif not open_entries[operation.sar_id]:
+            results[operation.key] = ("not_checked_in", None)
+        else:
+            entry = open_entries[operation.sar_id].popleft()
+            if entry[0] == "new":
+                new_timelogs[entry[1]].update(signed_out=True, departed_at=operation.at)
+            else:
+                departures[entry[1]] = operation.at
+            results[operation.key] = ("signed_out", entry)
+
+    timelog_columns = (
+        timelog_models.id,
+        timelog_models.form211_id,
+        timelog_models.created_by,
+        timelog_models.sar_id,
+        timelog_models.name,
+        timelog_models.resource_type,
+        timelog_models.arrival_at,
+        timelog_models.departure_at,
     )
+    timelogs = {}
+    if new_timelogs:
+        # Returned in the order of the rows given. A time left out is now().
+        stmt = (
+            insert(timelog_models)
+            .values(
+                arrival_at=func.coalesce(
+                    bindparam("arrived_at", type_=DateTime(timezone=True)),
+                    func.now(),
+                ),
+                departure_at=case(
+                    (
+                        bindparam("signed_out", type_=Boolean),
+                        func.coalesce(
+                            bindparam("departed_at", type_=DateTime(timezone=True)),
+                            func.now(),
+                        ),
+                    )
+                ),
+            )
+            .returning(*timelog_columns, sort_by_parameter_order=True)
+        )
+        created_rows = (await db.execute(stmt, new_timelogs)).all()
+        timelogs.update((("new", index), row) for index, row in enumerate(created_rows))
+
+    if departures:
+        departed = values(
+            column("id", Integer),
+            column("departure_at", DateTime(timezone=True)),
+            name="departed",
+        ).data(list(departures.items()))
+        stmt = (
+            update(timelog_models)
+            .where(
+                timelog_models.id == departed.c.id,
+                timelog_models.departure_at.is_(None),
+            )
+            # A NULL in VALUES is untyped, hence the casts
+            .values(
+                departure_at=func.coalesce(
+                    cast(departed.c.departure_at, DateTime(timezone=True)),
+                    func.now(),
+                )
+            )
+            .returning(*timelog_columns)
+            .execution_options(synchronize_session=False)
+        )
+        timelogs.update(
+            (("open", row.id), row) for row in (await db.execute(stmt)).all()
+        )
+
+    for key, (status, entry) in results.items():
+        # Signed out in between by another request
+        if status == "signed_out" and entry not in timelogs:
+            results[key] = ("not_checked_in", None)
+
+    if results:
+        stored = values(
+            column("key", String),
+            column("status", String),
+            column("timelog_id", Integer),
+            name="stored",
+        ).data(
+            [
+                (key, status, timelogs[entry].id if entry is not None else None)
+                for key, (status, entry) in results.items()
+            ]
+        )
+        stmt = (
+            update(models.OperationKey)
+            .where(models.OperationKey.key == stored.c.key)
+            .values(
+                status=stored.c.status,
+                timelog_id=cast(stored.c.timelog_id, Integer),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await db.execute(stmt)
+
+    await db.commit()
+
+    items = []
+    applied_keys = set()
+    for operation in request_data:
+        if operation.key in results:
+            status, entry = results[operation.key]
+            timelog = timelogs.get(entry)
+            duplicate = operation.key in applied_keys
+            applied_keys.add(operation.key)
+        else:
+            timelog = previous_results[operation.key]
+            status = timelog.status
+            duplicate = True
+            if timelog.id is None:
+                timelog = None
+
+        items.append(
+            schemas.ApplyOperationsForm211ResponseItem(
+                key=operation.key,
+                status=status,
+                duplicate=duplicate,
+                timelog=_operation_timelog(timelog) if timelog is not None else None,
+            )
+        )
 
-    timelog = (await db.execute(stmt)).scalar()
+    return schemas.ApplyOperationsForm211Response(count=len(results), items=items)
+
+
+@router.put("/{form211_id}/sign_out/{sar_id}", summary="Sign out to a Form 211")
+@query_budget(1)
+async def put_sign_out_form211(
+    db: Annotated[AsyncSession, Depends(get_async_db_session)],
+    form211_id: int,
+    sar_id: int,
+) -> schemas.SignOutForm211Response:
+    # Check the form and the member and sign out the entry that is not already
+    # signed out in one statement. It returns no row without an active form,
+    # and tells a sar id that no member has from a member that is not checked in.
+    active_form211 = _active_form211(form211_id)
+    member = (
+        select(user_models.id)
+        .where(user_models.sar_id == sar_id, user_models.deleted_at.is_(None))
+        .limit(1)
+        .cte("member")
+    )
+    is_member = exists(member.select())
+    open_timelog_id = (
+        select(timelog_models.id)
+        .where(
+            timelog_models.form211_id == form211_id,
+            timelog_models.sar_id == sar_id,
+            timelog_models.departure_at.is_(None),
+            timelog_models.deleted_at.is_(None),
+            exists(active_form211.select()),
+            is_member,
+        )
+        .limit(1)
+        .scalar_subquery()
+    )
+    signed_out = (
+        update(timelog_models)
+        .where(
+            timelog_models.id == open_timelog_id,
+            timelog_models.departure_at.is_(None),
+        )
+        .values(departure_at=func.now())
+        .returning(
+            timelog_models.id,
+            timelog_models.form211_id,
+            timelog_models.created_by,
+            timelog_models.sar_id,
+            timelog_models.name,
+            timelog_models.resource_type,
+            timelog_models.arrival_at,
+            timelog_models.departure_at,
+        )
+        .cte("signed_out")
+    )
+    stmt = select(is_member.label("is_member"), *signed_out.c).outerjoin_from(
+        active_form211, signed_out, true()
+    )
+
+    timelog = (await db.execute(stmt)).first()
     if timelog is None:
+        raise HTTPException(status_code=404, detail="Form 211 not found")
+    if not timelog.is_member:
+        raise HTTPException(status_code=404, detail="SAR ID not found")
+    if timelog.id is None:
         raise HTTPException(status_code=404, detail="User not checked in.")
 
-    timelog.departure_at = func.now()
     await db.commit()
-    await db.refresh(timelog)
 
     return schemas.SignInForm211Response(
         id=timelog.id,
@@ -271,16 +749,158 @@ async def put_sign_out_form211(
     )
 
 
-@router.get("/{form211_id}/arrivals", summary="Retrieve a form 211")
+@router.put("/{form211_id}/sign_out", summary="Sign out everyone on a Form 211")
+@query_budget(2)
+async def put_demobilize_form211(
+    db: Annotated[AsyncSession, Depends(get_async_db_session)],
+    form211_id: int,
+    request_data: schemas.DemobilizeForm211Request | None = None,
+) -> schemas.DemobilizeForm211Response:
+    form211_is_active = exists().where(
+        models.Form211.id == form211_id,
+        models.Form211.deleted_at.is_(None),
+    )
+
+    # Close every open entry, optionally only for some users or resource types,
+    # in a single UPDATE ... RETURNING.
+    stmt = (
+        update(timelog_models)
+        .where(
+            timelog_models.form211_id == form211_id,
+            timelog_models.departure_at.is_(None),
+            timelog_models.deleted_at.is_(None),
+            form211_is_active,
+        )
+        .values(departure_at=func.now())
+        .returning(
+            timelog_models.id,
+            timelog_models.form211_id,
+            timelog_models.created_by,
+            timelog_models.sar_id,
+            timelog_models.name,
+            timelog_models.resource_type,
+            timelog_models.arrival_at,
+            timelog_models.departure_at,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if request_data is not None and request_data.sar_ids is not None:
+        stmt = stmt.where(timelog_models.sar_id.in_(request_data.sar_ids))
+    if request_data is not None and request_data.resource_type is not None:
+        stmt = stmt.where(timelog_models.resource_type == request_data.resource_type)
+
+    result_rows = (await db.execute(stmt)).all()
+
+    # Nothing signed out can also mean there is no such form, only then is it
+    # worth a second query to tell the two apart.
+    if not result_rows and not (await db.execute(select(form211_is_active))).scalar():
+        raise HTTPException(status_code=404, detail="Form 211 not found")
+
+    await db.commit()
+
+    return schemas.DemobilizeForm211Response(
+        count=len(result_rows),
+        items=[
+            schemas.SignOutForm211Response(
+                id=row.id,
+                form211_id=row.form211_id,
+                created_by=row.created_by,
+                sar_id=row.sar_id,
+                name=row.name,
+                resource_type=row.resource_type,
+                arrival_at=row.arrival_at,
+                departure_at=row.departure_at,
+            )
+            for row in result_rows
+        ],
+    )
+
+
+@router.get(
+    "/{form211_id}/arrivals",
+    summary="Retrieve a form 211",
+    response_model=schemas.ListTimelogResponse,
+)
+@query_budget(3)
 async def get_form211_arrivals(
     db: Annotated[AsyncSession, Depends(get_async_db_session)],
+    request: Request,
     form211_id: int,
-) -> schemas.ListTimelogResponse:
-    count_stmt = select(func.count(timelog_models.id)).where(
-        timelog_models.form211_id == form211_id, timelog_models.deleted_at.is_(None)
+    count: Count = CountMode.exact,
+) -> Response:
+    # Every change to the board inserts a timelog or writes one, soft deletes
+    # included, and a write sets the row's change_xid to its own transaction.
+    # The newest updated_at would miss a write that commits after a later
+    # transaction, so the validator sums a hash of every (id, change_xid), with
+    # the number of rows. Both come off ix_timelog_form211_id_change_xid_id.
+    stmt = select(
+        func.sum(
+            func.hashtext(
+                cast(timelog_models.id, Text)
+                + ":"
+                + cast(timelog_models.change_xid, Text)
+            )
+        ),
+        func.count(),
+    ).where(timelog_models.form211_id == form211_id)
+    version, total = (await db.execute(stmt)).one()
+
+    etag = make_etag("arrivals", form211_id, version, total, count.value)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
+    stmt = (
+        select(
+            timelog_models.id,
+            timelog_models.form211_id,
+            timelog_models.created_by,
+            timelog_models.sar_id,
+            timelog_models.name,
+            timelog_models.resource_type,
+            timelog_models.arrival_at,
+            timelog_models.departure_at,
+            timelog_models.created_at,
+            timelog_models.updated_at,
+        )
+        .where(
+            timelog_models.form211_id == form211_id,
+            timelog_models.deleted_at.is_(None),
+        )
+        .order_by(timelog_models.arrival_at, timelog_models.id)
     )
-    count_result = (await db.execute(count_stmt)).scalar() or 0
 
+    result_rows = (await db.execute(stmt)).all()
+
+    # The whole board is returned, so an exact count is just its length.
+    if count is CountMode.exact:
+        count_result = len(result_rows)
+    else:
+        count_result = await get_count(db, count, stmt)
+
+    response = json_response(
+        {
+            "count": count_result,
+            "count_mode": count,
+            "items": row_items(schemas.ListTimelogResponseItem, result_rows),
+        }
+    )
+    set_etag(response, etag)
+    return response
+
+
+@router.get(
+    "/{form211_id}/arrivals/changes",
+    summary="Sync the changes to the arrivals of a form 211 since a watermark",
+    response_model=schemas.TimelogChangesResponse,
+)
+@query_budget(1)
+async def get_form211_arrival_changes(
+    db: Annotated[AsyncSession, Depends(get_async_db_session)],
+    form211_id: int,
+    since: Since = None,
+    limit: Limit = DEFAULT_LIMIT,
+) -> Response:
+    # A range scan of ix_timelog_form211_id_change_xid_id from the watermark on.
     stmt = select(
         timelog_models.id,
         timelog_models.form211_id,
@@ -292,27 +912,297 @@ async def get_form211_arrivals(
         timelog_models.departure_at,
         timelog_models.created_at,
         timelog_models.updated_at,
-    ).where(
-        timelog_models.form211_id == form211_id, timelog_models.deleted_at.is_(None)
+        timelog_models.deleted_at,
+        timelog_models.change_xid,
+    ).where(timelog_models.form211_id == form211_id)
+    page_stmt = paginate_changes(
+        stmt,
+        timelog_models.change_xid,
+        timelog_models.id,
+        limit,
+        since,
+    )
+
+    result_rows, watermark, has_more = next_changes(
+        (await db.execute(page_stmt)).all(), limit, since
+    )
+
+    return json_response(
+        {
+            "items": row_items(schemas.TimelogChangeItem, result_rows),
+            "watermark": watermark,
+            "has_more": has_more,
+        }
+    )
+
+
+@router.get("/{form211_id}/summary", summary="Count who is on scene on a form 211")
+@query_budget(1)
+async def get_form211_summary(
+    db: Annotated[AsyncSession, Depends(get_async_db_session)],
+    form211_id: int,
+) -> schemas.Form211SummaryResponse:
+    # The counts are kept by triggers on the timelog table, see migration 008.
+    # The form is joined in so that a missing one costs no second query.
+    stmt = (
+        select(
+            models.Form211Summary.resource_type,
+            models.Form211Summary.on_scene,
+            models.Form211Summary.entries,
+        )
+        .select_from(models.Form211)
+        .outerjoin(
+            models.Form211Summary,
+            (models.Form211Summary.form211_id == models.Form211.id)
+            & (models.Form211Summary.entries > 0),
+        )
+        .where(models.Form211.id == form211_id, models.Form211.deleted_at.is_(None))
+        .order_by(models.Form211Summary.resource_type)
+    )
+    result_rows = (await db.execute(stmt)).all()
+
+    if not result_rows:
+        raise HTTPException(status_code=404, detail="Form 211 not found")
+
+    items = [
+        schemas.Form211SummaryItem(
+            resource_type=row.resource_type,
+            on_scene=row.on_scene,
+            entries=row.entries,
+        )
+        for row in result_rows
+        if row.resource_type is not None
+    ]
+    return schemas.Form211SummaryResponse(
+        form211_id=form211_id,
+        on_scene=sum(item.on_scene for item in items),
+        entries=sum(item.entries for item in items),
+        items=items,
+    )
+
+
+@router.get("/{form211_id}/hours", summary="Total the person-hours of a form 211")
+@query_budget(1)
+async def get_form211_hours(
+    db: Annotated[AsyncSession, Depends(get_async_db_session)],
+    form211_id: int,
+    group_by: Annotated[
+        list[Literal["person", "resource_type"]] | None,
+        Query(
+            description="Total by person (sar id and name), resource type or both, "
+            "by person if it is left out"
+        ),
+    ] = None,
+) -> schemas.Form211HoursResponse:
+    group_by = list(dict.fromkeys(group_by or ["person"]))
+    # closed_at defaults to the creation time, so only a later one closes the
+    # operational period. Entries still open count up to it, or up to now.
+    period_end = func.least(
+        case(
+            (
+                models.Form211.closed_at > models.Form211.created_at,
+                models.Form211.closed_at,
+            ),
+            else_=func.now(),
+        ),
+        func.now(),
+    )
+    departure_at = func.coalesce(timelog_models.departure_at, period_end)
+    seconds = func.greatest(
+        func.extract("epoch", departure_at - timelog_models.arrival_at), 0
     )
 
+    group_columns = [
+        group_column for group in group_by for group_column in HOURS_GROUPS[group]
+    ]
+    # The form is joined in so that a missing one costs no second query.
+    stmt = (
+        select(
+            models.Form211.operational_period,
+            *group_columns,
+            func.count(timelog_models.id).label("entries"),
+            func.coalesce(func.sum(seconds), 0).label("seconds"),
+        )
+        .select_from(models.Form211)
+        .outerjoin(
+            timelog_models,
+            (timelog_models.form211_id == models.Form211.id)
+            & timelog_models.deleted_at.is_(None),
+        )
+        .where(models.Form211.id == form211_id, models.Form211.deleted_at.is_(None))
+        .group_by(models.Form211.id, *group_columns)
+        .order_by(*group_columns)
+    )
     result_rows = (await db.execute(stmt)).all()
 
-    return schemas.ListTimelogResponse(
-        count=count_result,
-        items=[
-            schemas.ListTimelogResponseItem(
-                id=row.id,
-                form211_id=row.form211_id,
-                sar_id=row.sar_id,
-                created_by=row.created_by,
-                name=row.name,
-                resource_type=row.resource_type,
-                arrival_at=row.arrival_at,
-                departure_at=row.departure_at,
-                created_at=row.created_at,
-                updated_at=row.updated_at,
-            )
-            for row in result_rows
-        ],
+    if not result_rows:
+        raise HTTPException(status_code=404, detail="Form 211 not found")
+
+    items = [
+        schemas.Form211HoursItem(
+            **{
+                group_column.key: row._mapping[group_column]
+                for group_column in group_columns
+            },
+            entries=row.entries,
+            hours=round(row.seconds / 3600, 2),
+        )
+        for row in result_rows
+        if row.entries
+    ]
+    return schemas.Form211HoursResponse(
+        form211_id=form211_id,
+        operational_period=result_rows[0].operational_period,
+        group_by=group_by,
+        entries=sum(row.entries for row in result_rows),
+        hours=round(sum(row.seconds for row in result_rows) / 3600, 2),
+        items=items,
+    )
+
+
+async def _stream_arrivals(
+    stmt: Select, export_format: Literal["csv", "ndjson"]
+) -> AsyncIterator[str]:
+    """Stream the arrivals off a server side cursor, one chunk of rows at a time.
+
+    The request's session is closed before a streaming body is sent, so the
+    stream runs in a session of its own.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if export_format == "csv":
+        writer.writerow(ICS211_COLUMNS)
+        # Send the header before the query runs so the download starts at once.
+        yield buffer.getvalue()
+
+    list_number = 0
+    async with async_session_maker() as session:
+        result = await session.stream(stmt)
+        async for rows in result.partitions():
+            buffer.seek(0)
+            buffer.truncate()
+            for row in rows:
+                if export_format == "csv":
+                    list_number += 1
+                    writer.writerow(
+                        (
+                            list_number,
+                            row.resource_type,
+                            row.name,
+                            row.sar_id,
+                            row.arrival_at.isoformat(),
+                            1,
+                            row.departure_at.isoformat() if row.departure_at else "",
+                        )
+                    )
+                else:
+                    buffer.write(
+                        json.dumps(dict(row._mapping), default=datetime.isoformat)
+                        + "\n"
+                    )
+            yield buffer.getvalue()
+
+
+@router.get(
+    "/{form211_id}/arrivals/export",
+    summary="Export the arrivals of a form 211 as an ICS 211 CSV or as NDJSON",
+    response_class=StreamingResponse,
+)
+async def get_form211_arrivals_export(
+    db: Annotated[AsyncSession, Depends(get_async_db_session)],
+    form211_id: int,
+    export_format: Annotated[Literal["csv", "ndjson"], Query(alias="format")] = "csv",
+) -> StreamingResponse:
+    # Check that we are loading an active
+    stmt = select(models.Form211.id).where(
+        models.Form211.id == form211_id,
+        models.Form211.deleted_at.is_(None),
+    )
+
+    if (await db.execute(stmt)).scalar() is None:
+        raise HTTPException(status_code=404, detail="Form 211 not found")
+
+    stmt = (
+        select(
+            timelog_models.id,
+            timelog_models.form211_id,
+            timelog_models.created_by,
+            timelog_models.sar_id,
+            timelog_models.name,
+            timelog_models.resource_type,
+            timelog_models.arrival_at,
+            timelog_models.departure_at,
+            timelog_models.created_at,
+            timelog_models.updated_at,
+        )
+        .where(
+            timelog_models.form211_id == form211_id,
+            timelog_models.deleted_at.is_(None),
+        )
+        .order_by(timelog_models.arrival_at, timelog_models.id)
+        .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+    )
+
+    if export_format == "csv":
+        return StreamingResponse(
+            _stream_arrivals(stmt, export_format),
+            media_type="text/csv",
+            headers={
+                "Content-Disposition": f'attachment; filename="ics211-{form211_id}.csv"'
+            },
+        )
+
+    return StreamingResponse(
+        _stream_arrivals(stmt, export_format), media_type="application/x-ndjson"
+    )
+
+
+async def _stream_events(form211_id: int) -> AsyncIterator[str]:
+    """Stream the timelog events of a Form 211 as server-sent events.
+
+    A ready event is sent once the subscription is live, clients should load the
+    arrivals after it so that no change falls in between. The stream ends with a
+    resync event if events were lost, the client should then reload the arrivals
+    and reconnect.
+    """
+    async with timelog_events.subscribe(form211_id) as subscription:
+        yield "retry: 3000\nevent: ready\ndata: {}\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    subscription.get(), EVENTS_KEEPALIVE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+
+            if event is None:
+                yield "event: resync\ndata: {}\n\n"
+                return
+
+            yield f"event: {event.event}\ndata: {event.data}\n\n"
+
+
+@router.get(
+    "/{form211_id}/events",
+    summary="Subscribe to the sign ins, sign outs and edits of a form 211",
+    response_class=StreamingResponse,
+)
+async def get_form211_events(
+    db: Annotated[AsyncSession, Depends(get_async_db_session)],
+    form211_id: int,
+) -> StreamingResponse:
+    # Check that we are loading an active
+    stmt = select(models.Form211.id).where(
+        models.Form211.id == form211_id,
+        models.Form211.deleted_at.is_(None),
+    )
+
+    if (await db.execute(stmt)).scalar() is None:
+        raise HTTPException(status_code=404, detail="Form 211 not found")
+
+    return StreamingResponse(
+        _stream_events(form211_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
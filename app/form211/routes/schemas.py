@@ -1,7 +1,8 @@
 from datetime import datetime
-from typing import Optional
+from typing import Annotated, Literal, Optional, Union
 
-from pydantic import BaseModel
+from pagination import CountMode
+from pydantic import BaseModel, Field
 
 
 class CreateForm211Request(BaseModel):
@@ -41,8 +42,10 @@ class ListForm211ResponseItem(BaseModel):
 
 
 class ListForm211Response(BaseModel):
-    count: int
+    count: Optional[int]
+    count_mode: CountMode
     items: list[ListForm211ResponseItem]
+    next_cursor: Optional[str] = None
 
 
 class UpdateForm211Request(BaseModel):
@@ -75,6 +78,19 @@ class SignInForm211Response(BaseModel):
     departure_at: Optional[datetime] = None
 
 
+class BulkSignInForm211ResponseItem(BaseModel):
+    # signed_in: a member was signed in.
+    # guest: the sar id is not on the roster, it was signed in with sar id 0.
+    # duplicate: the member is earlier in the same request, nothing was created.
+    status: Literal["signed_in", "guest", "duplicate"]
+    timelog: Optional[SignInForm211Response] = None
+
+
+class BulkSignInForm211Response(BaseModel):
+    count: int
+    items: list[BulkSignInForm211ResponseItem]
+
+
 class SignOutForm211Request(BaseModel):
     sar_id: int
 
@@ -90,6 +106,60 @@ class SignOutForm211Response(BaseModel):
     departure_at: Optional[datetime] = None
 
 
+# The idempotency key the client gave an operation, a UUID for instance.
+OperationKey = Annotated[str, Field(min_length=1, max_length=100)]
+
+
+class SignInOperation(BaseModel):
+    key: OperationKey
+    operation: Literal["sign_in"]
+    sar_id: int
+    name: str
+    created_by: int
+    # When the sign in happened on the device, now if it is not given.
+    at: Optional[datetime] = None
+
+
+class SignOutOperation(BaseModel):
+    key: OperationKey
+    operation: Literal["sign_out"]
+    sar_id: int
+    at: Optional[datetime] = None
+
+
+Operation = Annotated[
+    Union[SignInOperation, SignOutOperation], Field(discriminator="operation")
+]
+
+
+class ApplyOperationsForm211ResponseItem(BaseModel):
+    key: str
+    # signed_in / guest: as for a bulk sign in.
+    # signed_out: the oldest open entry of the member was signed out.
+    # not_member: the sar id is not on the roster, nothing was signed out.
+    # not_checked_in: the member had no open entry, nothing was signed out.
+    status: Literal["signed_in", "guest", "signed_out", "not_member", "not_checked_in"]
+    # The key was applied before, by an earlier upload or earlier in this one.
+    # status is the result it had then, timelog the entry as it is now.
+    duplicate: bool
+    timelog: Optional[SignInForm211Response] = None
+
+
+class ApplyOperationsForm211Response(BaseModel):
+    count: int
+    items: list[ApplyOperationsForm211ResponseItem]
+
+
+class DemobilizeForm211Request(BaseModel):
+    sar_ids: Optional[list[int]] = None
+    resource_type: Optional[str] = None
+
+
+class DemobilizeForm211Response(BaseModel):
+    count: int
+    items: list[SignOutForm211Response]
+
+
 class ListTimelogResponseItem(BaseModel):
     id: int
     form211_id: int
@@ -104,5 +174,62 @@ class ListTimelogResponseItem(BaseModel):
 
 
 class ListTimelogResponse(BaseModel):
-    count: int
+    count: Optional[int]
+    count_mode: CountMode
     items: list[ListTimelogResponseItem]
+
+
+class TimelogChangeItem(BaseModel):
+    id: int
+    form211_id: int
+    sar_id: int
+    created_by: Optional[int]
+    name: str
+    resource_type: str
+    arrival_at: Optional[datetime]
+    departure_at: Optional[datetime]
+    created_at: datetime
+    updated_at: datetime
+    # Set on a tombstone: the entry was deleted, drop it.
+    deleted_at: Optional[datetime]
+
+
+class TimelogChangesResponse(BaseModel):
+    items: list[TimelogChangeItem]
+    # Send it as since on the next sync.
+    watermark: Optional[str]
+    # There are more changes than the limit, sync again right away.
+    has_more: bool
+
+
+class Form211SummaryItem(BaseModel):
+    resource_type: str
+    on_scene: int
+    entries: int
+
+
+class Form211SummaryResponse(BaseModel):
+    form211_id: int
+    # Signed in and not signed out
+    on_scene: int
+    # Every entry that is not deleted, signed out ones included
+    entries: int
+    items: list[Form211SummaryItem]
+
+
+class Form211HoursItem(BaseModel):
+    # Only the fields grouped by are set.
+    sar_id: Optional[int] = None
+    name: Optional[str] = None
+    resource_type: Optional[str] = None
+    entries: int
+    hours: float
+
+
+class Form211HoursResponse(BaseModel):
+    form211_id: int
+    operational_period: int
+    group_by: list[str]
+    entries: int
+    hours: float
+    items: list[Form211HoursItem]
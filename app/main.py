@@ -1,17 +1,40 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from pathlib import Path
+from typing import AsyncIterator
 
-from fastapi import APIRouter, FastAPI
+import settings
+from admin.routes.admin import router as admin_router
+from compression import CompressionMiddleware
+from db import engine
+from fastapi import APIRouter, FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from form211.events import timelog_events
 from form211.routes.form211 import router as form211_router
+from metrics import MetricsMiddleware, render
+from static import FrontendFiles
 from timelog.routes.timelog import router as timelog_router
 from user.routes.user import router as user_router
+from warmup import readiness, warm_up_until_ready
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    warmup = asyncio.create_task(warm_up_until_ready(app))
+    yield
+    warmup.cancel()
+    with suppress(asyncio.CancelledError):
+        await warmup
+    await timelog_events.close()
+    await engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
 v1_router = APIRouter(prefix="/api/v1")
 v1_router.include_router(user_router, prefix="/user")
 v1_router.include_router(form211_router, prefix="/211")
 v1_router.include_router(timelog_router, prefix="/timelog")
+v1_router.include_router(admin_router, prefix="/admin")
 app.include_router(v1_router)
 
 origins = ["*"]
@@ -24,6 +47,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 
 @app.get("/health", tags=["health"])
@@ -31,6 +56,30 @@ async def health_check() -> dict:
     return {"status": "healthy", "version": "1.0.0"}
 
 
+@app.get("/ready", tags=["health"])
+async def ready_check(response: Response) -> dict:
+    # Ready once the worker's connection pool is warmed up, see warmup.py
+    if not readiness.ready:
+        response.status_code = 503
+        return {"status": "warming up", "error": readiness.error}
+
+    return {"status": "ready"}
+
+
+@app.get("/metrics", tags=["health"], include_in_schema=False)
+async def get_metrics() -> Response:
+    content, media_type = render()
+    return Response(content=content, media_type=media_type)
+
+
 # Mount frontend static files
 frontend_path = Path(__file__).parent / "dist"
-app.mount("/", StaticFiles(directory=str(frontend_path), html=True), name="frontend")
+app.mount(
+    "/",
+    FrontendFiles(
+        directory=str(frontend_path),
+        html=True,
+        memory_max_size=settings.STATIC_MEMORY_MAX_SIZE,
+    ),
+    name="frontend",
+)
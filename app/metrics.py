@@ -0,0 +1,198 @@
+"""Prometheus metrics of the HTTP requests and of the queries they run.
+
+MetricsMiddleware times every request and labels it with the route template
+(/api/v1/211/{form211_id}/arrivals, not the path), so the series stay bounded.
+The queries are timed by cursor events on the shared engine and added up in a
+RequestStats that lives in a context variable for the duration of the request.
+
+The same stats are reported to the client in a Server-Timing header (db is the
+queries run before the response started, app the time to the response start) and
+checked against settings.QUERY_BUDGET, so that a route that starts running more
+queries than it should, an N+1 or an extra lookup, is logged. With
+QUERY_BUDGET_STRICT the request fails instead, which is how the tests run.
+
+The warm-up requests of a starting worker (warmup.py) carry WARMUP_SCOPE_KEY in
+their ASGI scope and are left out, they are not traffic. A scope key rather than a
+header, so that clients cannot leave requests out.
+
+The metrics are served in Prometheus text format on /metrics. When several worker
+processes serve the app, set PROMETHEUS_MULTIPROC_DIR to an empty directory so
+that every worker's metrics are collected.
+"""
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, TypeVar
+
+import settings
+from db import engine
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+UNMATCHED_ROUTE = "unmatched"
+WARMUP_SCOPE_KEY = "warmup"
+
+Endpoint = TypeVar("Endpoint", bound=Callable[..., Any])
+
+REQUESTS = Counter(
+    "http_requests_total", "HTTP requests", ["method", "route", "status"]
+)
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time to serve an HTTP request, including a streamed body",
+    ["method", "route"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests being served",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+DB_QUERIES = Counter(
+    "db_queries_total", "Database queries run by HTTP requests", ["method", "route"]
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Time of a database query run by an HTTP request",
+    ["method", "route"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """A request ran more queries than settings.QUERY_BUDGET allows."""
+
+
+class RequestStats:
+    """The queries run by one request."""
+
+    __slots__ = ("query_durations",)
+
+    def __init__(self) -> None:
+        self.query_durations: list[float] = []
+
+    @property
+    def queries(self) -> int:
+        return len(self.query_durations)
+
+    @property
+    def db_seconds(self) -> float:
+        return sum(self.query_durations)
+
+
+def query_budget(queries: int) -> Callable[[Endpoint], Endpoint]:
+    """Give an endpoint a query budget of its own instead of settings.QUERY_BUDGET.
+
+    Goes below the route decorator.
+    """
+
+    def decorate(endpoint: Endpoint) -> Endpoint:
+        endpoint.query_budget = queries
+        return endpoint
+
+    return decorate
+
+
+request_stats: ContextVar[RequestStats | None] = ContextVar(
+    "request_stats", default=None
+)
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, many: bool
+) -> None:
+    context.metrics_query_start = time.perf_counter()
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, many: bool
+) -> None:
+    stats = request_stats.get()
+    if stats is not None:
+        stats.query_durations.append(time.perf_counter() - context.metrics_query_start)
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope.get(WARMUP_SCOPE_KEY):
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed = time.perf_counter() - start
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;desc="{stats.queries} queries";'
+                    f"dur={stats.db_seconds * 1000:.2f}, app;dur={elapsed * 1000:.2f}",
+                )
+            await send(message)
+
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            in_progress.dec()
+            request_stats.reset(token)
+
+            # The router sets the matched route on the scope
+            route = scope.get("route")
+            template = route.path if route is not None else UNMATCHED_ROUTE
+            REQUESTS.labels(method, template, status).inc()
+            REQUEST_DURATION.labels(method, template).observe(duration)
+            if stats.query_durations:
+                DB_QUERIES.labels(method, template).inc(stats.queries)
+                query_duration = DB_QUERY_DURATION.labels(method, template)
+                for query in stats.query_durations:
+                    query_duration.observe(query)
+
+        budget = getattr(route, "endpoint", None)
+        budget = getattr(budget, "query_budget", settings.QUERY_BUDGET)
+        if stats.queries > budget:
+            message = (
+                f"{method} {template} ran {stats.queries} queries, over its budget "
+                f"of {budget}"
+            )
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+
+def render() -> tuple[bytes, str]:
+    """The metrics in Prometheus text format, and their content type."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
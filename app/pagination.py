@@ -0,0 +1,215 @@
+"""Keyset (cursor) pagination and row counts for the list endpoints.
+
+Pages are ordered newest first on ``(created_at, id)``. The cursor handed back to
+the client is an opaque encoding of the last row of the page, and the next page is
+selected with a row-value comparison against it, so fetching page 500 costs the
+same index range scan as fetching page 1.
+
+The count that comes with a list is chosen by the client: an exact count of all
+the rows, sent with the first page only, the planner's estimate, or none at all.
+
+The change feeds that offline clients sync from are paged the same way, in the
+order the changes committed, on ``(change_xid, id)``. The cursor of the last
+change, the watermark, is what the client sends back on its next sync, so a sync
+costs an index range scan over what changed since, whatever the size of the
+table.
+
+change_xid is the transaction that wrote the row, and ids are handed out as the
+transactions first write, not as they commit. A feed therefore stops at the xmin
+of its own snapshot, below which every transaction has ended: a change is only
+sent once nothing that could commit behind it is still open. Only transactions
+that have written hold the feeds back, long reads such as the exports do not.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Annotated, Any, Sequence
+
+from fastapi import HTTPException, Query
+from sqlalchemy import (
+    BigInteger,
+    ClauseElement,
+    Executable,
+    Select,
+    Text,
+    cast,
+    func,
+    tuple_,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import InstrumentedAttribute
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+Limit = Annotated[
+    int, Query(ge=1, le=MAX_LIMIT, description="Maximum number of items to return")
+]
+After = Annotated[
+    str | None,
+    Query(description="The next_cursor value returned by the previous page"),
+]
+Since = Annotated[
+    str | None,
+    Query(
+        description="The watermark returned by the previous sync, leave it out "
+        "for a full sync"
+    ),
+]
+
+
+class CountMode(str, Enum):
+    exact = "exact"
+    estimate = "estimate"
+    none = "none"
+
+
+Count = Annotated[
+    CountMode,
+    Query(
+        description="How to count the rows: exact (all the rows, on the first page "
+        "only, later pages have no count), estimate (the query planner's estimate) "
+        "or none"
+    ),
+]
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) of a statement, keeping its bound parameters."""
+
+    inherit_cache = False
+
+    def __init__(self, statement: Select) -> None:
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element: Explain, compiler: Any, **kw: Any) -> str:
+    return f"EXPLAIN (FORMAT JSON) {compiler.process(element.statement, **kw)}"
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Decode a cursor produced by encode_cursor, raise a 400 if it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded).decode()
+        created_at, _, row_id = raw.partition("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as err:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from err
+
+
+def encode_watermark(change_xid: int, row_id: int) -> str:
+    raw = f"{change_xid}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_watermark(watermark: str) -> tuple[int, int]:
+    """Decode a watermark produced by encode_watermark, raise a 400 if malformed."""
+    try:
+        padded = watermark + "=" * (-len(watermark) % 4)
+        raw = base64.urlsafe_b64decode(padded).decode()
+        change_xid, _, row_id = raw.partition("|")
+        return int(change_xid), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as err:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from err
+
+
+def paginate(
+    stmt: Select,
+    created_at: InstrumentedAttribute,
+    row_id: InstrumentedAttribute,
+    limit: int,
+    after: str | None,
+) -> Select:
+    """Order a select newest first and restrict it to the page after the cursor.
+
+    One row more than the limit is fetched so that next_page can tell whether
+    there is another page without running a second query.
+    """
+    if after is not None:
+        stmt = stmt.where(tuple_(created_at, row_id) < tuple_(*decode_cursor(after)))
+
+    return stmt.order_by(created_at.desc(), row_id.desc()).limit(limit + 1)
+
+
+def next_page(rows: Sequence[Any], limit: int) -> tuple[Sequence[Any], str | None]:
+    """Split the rows of a paginated select into the page and the next cursor."""
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+
+
+async def get_count(
+    db: AsyncSession, count: CountMode, stmt: Select, after: str | None = None
+) -> int | None:
+    """Get the row count for the mode asked for.
+
+    stmt is the filtered select without pagination. An exact count is a separate
+    count of all the rows it selects, run for the first page only (no cursor):
+    the later pages answer None and the client keeps the first page's count. For
+    an estimate stmt is only planned, never run.
+    """
+    if count is CountMode.exact:
+        if after is not None:
+            return None
+        count_stmt = stmt.with_only_columns(func.count(), maintain_column_froms=True)
+        return (await db.execute(count_stmt)).scalar_one()
+
+    if count is CountMode.estimate:
+        plan = (await db.execute(Explain(stmt))).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    return None
+
+
+def paginate_changes(
+    stmt: Select,
+    change_xid: InstrumentedAttribute,
+    row_id: InstrumentedAttribute,
+    limit: int,
+    since: str | None,
+) -> Select:
+    """Order a select in commit order and restrict it to the changes since.
+
+    Only the changes of the transactions that ended before the snapshot of the
+    statement are selected. Soft deleted rows are changes too, they are returned
+    as tombstones. A full sync returns them as well: it can take several pages,
+    and a row deleted in the meantime has to reach the client either way.
+    """
+    snapshot_xmin = cast(
+        cast(func.pg_snapshot_xmin(func.pg_current_snapshot()), Text), BigInteger
+    )
+    stmt = stmt.where(change_xid < snapshot_xmin)
+    if since is not None:
+        stmt = stmt.where(tuple_(change_xid, row_id) > tuple_(*decode_watermark(since)))
+
+    return stmt.order_by(change_xid, row_id).limit(limit + 1)
+
+
+def next_changes(
+    rows: Sequence[Any], limit: int, since: str | None
+) -> tuple[Sequence[Any], str | None, bool]:
+    """Split the rows of a change feed into the changes, the watermark and has_more.
+
+    The rows have to include change_xid. With no changes the watermark the client
+    sent is handed back.
+    """
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if not rows:
+        return rows, since, has_more
+
+    return rows, encode_watermark(rows[-1].change_xid, rows[-1].id), has_more
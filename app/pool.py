@@ -0,0 +1,55 @@
+"""A connection pool that keeps statistics about itself.
+
+The engine's pool is an InstrumentedPool, it times how long each checkout waits
+for a connection and counts the connections opened, closed and invalidated, so
+the admin endpoint can show whether the pool is sized right for a worker.
+"""
+import time
+from typing import Any
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.reset_stats()
+        event.listen(self, "connect", self._on_connect)
+        event.listen(self, "close", self._on_close)
+        event.listen(self, "invalidate", self._on_invalidate)
+
+    def reset_stats(self) -> None:
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.connects = 0
+        self.closes = 0
+        self.invalidations = 0
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = time.perf_counter()
+        try:
+            entry = super()._do_get()
+        except exc.TimeoutError:
+            self.checkout_timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+        self.checkouts += 1
+        return entry
+
+    def _on_connect(self, dbapi_connection: Any, connection_record: Any) -> None:
+        self.connects += 1
+
+    def _on_close(self, dbapi_connection: Any, connection_record: Any) -> None:
+        self.closes += 1
+
+    def _on_invalidate(
+        self, dbapi_connection: Any, connection_record: Any, exception: Any
+    ) -> None:
+        self.invalidations += 1
@@ -0,0 +1,70 @@
+"""Write .br, .zst and .gz siblings of the frontend files for static.py to serve.
+
+Run after every frontend build, the Dockerfile does it when the image is built:
+
+    python precompress.py dist
+
+Files that are already compressed (images, fonts) and siblings that would not be
+smaller than the file are skipped. brotli and zstd are skipped when their
+packages are not installed.
+"""
+import gzip
+import sys
+from pathlib import Path
+from typing import Callable
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+COMPRESSIBLE_SUFFIXES = {
+    ".css",
+    ".html",
+    ".js",
+    ".json",
+    ".map",
+    ".mjs",
+    ".svg",
+    ".txt",
+    ".xml",
+}
+
+# The build is compressed once, so use the highest levels.
+COMPRESSORS: dict[str, Callable[[bytes], bytes]] = {
+    ".gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0)
+}
+if brotli is not None:
+    COMPRESSORS[".br"] = lambda data: brotli.compress(data, quality=11)
+if zstandard is not None:
+    COMPRESSORS[".zst"] = zstandard.ZstdCompressor(level=19).compress
+
+
+def precompress(directory: Path) -> list[Path]:
+    """Write the compressed siblings of the files in directory, return them."""
+    written = []
+    for path in sorted(directory.rglob("*")):
+        if not path.is_file() or path.suffix not in COMPRESSIBLE_SUFFIXES:
+            continue
+
+        data = path.read_bytes()
+        for suffix, compress in COMPRESSORS.items():
+            compressed = compress(data)
+            if len(compressed) >= len(data):
+                continue
+
+            sibling = path.with_name(path.name + suffix)
+            sibling.write_bytes(compressed)
+            written.append(sibling)
+
+    return written
+
+
+if __name__ == "__main__":
+    for sibling in precompress(Path(sys.argv[1] if len(sys.argv) > 1 else "dist")):
+        print(sibling)
@@ -0,0 +1,103 @@
+"""Production entry point: gunicorn managing uvicorn workers.
+
+    python serve.py
+
+The app is imported once in the gunicorn master before the workers are forked,
+so they share its memory pages, and a worker that dies is replaced. The uvicorn
+workers use uvloop and httptools when they are installed (requirements.txt pins
+them). On SIGTERM the workers stop accepting connections and finish the
+requests in flight, for up to GRACEFUL_TIMEOUT seconds.
+
+Unless WEB_CONCURRENCY is set, there is one worker per available CPU, capped so
+that the workers' connection pools (plus the live events connection of each)
+fit in DB_CONNECTION_BUDGET.
+
+For development keep using uvicorn main:app --reload, see docker-compose.yml.
+"""
+import math
+import os
+import tempfile
+from pathlib import Path
+from typing import Any
+
+import settings
+from gunicorn.app.base import BaseApplication
+
+
+def available_cpus() -> int:
+    """The CPUs this process may run on, within the container's CPU quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover
+        cpus = os.cpu_count() or 1
+
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        if quota != "max":
+            cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+
+    return max(cpus, 1)
+
+
+def worker_count(cpus: int) -> int:
+    if settings.WEB_CONCURRENCY:
+        return settings.WEB_CONCURRENCY
+
+    connections_per_worker = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW + 1
+    return max(1, min(cpus, settings.DB_CONNECTION_BUDGET // connections_per_worker))
+
+
+def post_fork(server: Any, worker: Any) -> None:
+    # The master never queries, but never share a connection across a fork.
+    from db import engine
+
+    engine.sync_engine.dispose(close=False)
+
+
+def child_exit(server: Any, worker: Any) -> None:
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
+
+
+class Server(BaseApplication):
+    def __init__(self, options: dict[str, Any]) -> None:
+        self.options = options
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self) -> Any:
+        from main import app
+
+        return app
+
+
+def main() -> None:
+    workers = worker_count(available_cpus())
+    # Each worker has its own metrics, they are collected from this directory.
+    # It has to be set before the app, and so prometheus_client, is imported.
+    if workers > 1 and "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="metrics-")
+
+    Server(
+        {
+            "bind": settings.BIND,
+            "workers": workers,
+            "worker_class": "uvicorn.workers.UvicornWorker",
+            "preload_app": True,
+            "graceful_timeout": settings.GRACEFUL_TIMEOUT,
+            "keepalive": 5,
+            "post_fork": post_fork,
+            "child_exit": child_exit,
+        }
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
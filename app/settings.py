@@ -34,3 +34,45 @@ SQLALCHEMY_DATABASE_URL = (
     f"postgresql+asyncpg://{PG_USER}:{PG_PASSWORD}@{PG_HOST}:{PG_PORT}/{PG_DB}"
 )
 SQLALCHEMY_ECHO = get_env_var("SQLALCHEMY_ECHO", "") == "true"
+
+# Connection pool of each worker process, see pool.py. A worker holds at most
+# DB_POOL_SIZE + DB_MAX_OVERFLOW connections (plus one for live events).
+DB_POOL_SIZE = int(get_env_var("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(get_env_var("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(get_env_var("DB_POOL_TIMEOUT", "30"))
+# Seconds after which a connection is replaced, -1 to keep connections forever
+DB_POOL_RECYCLE = int(get_env_var("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = get_env_var("DB_POOL_PRE_PING", "") == "true"
+# Prepared statements cached per connection, 0 behind pgbouncer in transaction mode
+DB_STATEMENT_CACHE_SIZE = int(get_env_var("DB_STATEMENT_CACHE_SIZE", "100"))
+# Connections opened and prepared when a worker starts, see warmup.py
+WARMUP_CONNECTIONS = int(get_env_var("WARMUP_CONNECTIONS", str(DB_POOL_SIZE)))
+WARMUP_TIMEOUT = float(get_env_var("WARMUP_TIMEOUT", "30"))
+
+# In-process cache of sar id to user lookups, see user/cache.py
+MEMBER_CACHE_SIZE = int(get_env_var("MEMBER_CACHE_SIZE", "10000"))
+MEMBER_CACHE_TTL_SECONDS = float(get_env_var("MEMBER_CACHE_TTL_SECONDS", "60"))
+
+# Queries a request may run before it is logged as over budget (see metrics.py),
+# strict raises instead of logging so that the tests fail on it.
+QUERY_BUDGET = int(get_env_var("QUERY_BUDGET", "10"))
+QUERY_BUDGET_STRICT = get_env_var("QUERY_BUDGET_STRICT", "") == "true"
+
+# Response compression, see compression.py. Bodies smaller than the minimum size
+# are sent as they are, bodies from the thread size on are compressed off the
+# event loop.
+COMPRESSION_MIN_SIZE = int(get_env_var("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_THREAD_MIN_SIZE = int(get_env_var("COMPRESSION_THREAD_MIN_SIZE", "65536"))
+COMPRESSION_GZIP_LEVEL = int(get_env_var("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_LEVEL = int(get_env_var("COMPRESSION_BROTLI_LEVEL", "5"))
+COMPRESSION_ZSTD_LEVEL = int(get_env_var("COMPRESSION_ZSTD_LEVEL", "3"))
+
+# Frontend files up to this size are kept in memory, see static.py
+STATIC_MEMORY_MAX_SIZE = int(get_env_var("STATIC_MEMORY_MAX_SIZE", "262144"))
+
+# Production server, see serve.py. WEB_CONCURRENCY=0 picks the number of workers
+# from the CPUs and the connections that all the workers may open together.
+BIND = get_env_var("BIND", "0.0.0.0:8000")
+WEB_CONCURRENCY = int(get_env_var("WEB_CONCURRENCY", "0"))
+DB_CONNECTION_BUDGET = int(get_env_var("DB_CONNECTION_BUDGET", "90"))
+GRACEFUL_TIMEOUT = int(get_env_var("GRACEFUL_TIMEOUT", "30"))
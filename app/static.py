@@ -0,0 +1,149 @@
+"""Serve the frontend bundle in dist/ without reading it from disk every time.
+
+FrontendFiles is a StaticFiles that
+- serves the .br, .zst or .gz sibling of a file when the client accepts that
+  encoding, so the API workers never compress the bundle themselves (see
+  precompress.py, run when the image is built),
+- marks the hashed asset names of the build (assets/index-CCpUOCbt.js) as
+  immutable for a year, everything else (index.html) is revalidated,
+- keeps the files of up to STATIC_MEMORY_MAX_SIZE bytes, index.html included,
+  in memory. Every request still stats the file, which StaticFiles does in a
+  worker thread, and reloads it when its mtime or size changed.
+"""
+import hashlib
+import os
+import re
+import stat
+from dataclasses import dataclass
+from email.utils import formatdate
+from mimetypes import guess_type
+
+from compression import negotiate
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+# Encodings of the sibling files, in order of preference
+SIBLINGS = {"br": ".br", "zstd": ".zst", "gzip": ".gz"}
+# Vite puts the content hash of the file in its name
+HASHED_NAME = re.compile(r"(^|/)assets/.+-[A-Za-z0-9_-]{8}\.[A-Za-z0-9]+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+
+@dataclass(frozen=True)
+class _Variant:
+    path: str
+    stat_result: os.stat_result
+    # None when the file is too big to keep in memory
+    content: bytes | None
+
+
+@dataclass(frozen=True)
+class _CachedFile:
+    mtime_ns: int
+    size: int
+    media_type: str
+    variants: dict[str | None, _Variant]
+
+
+class FrontendFiles(StaticFiles):
+    def __init__(self, *args, memory_max_size: int, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.memory_max_size = memory_max_size
+        self._files: dict[str, _CachedFile] = {}
+
+    def _variant(self, path: str, stat_result: os.stat_result) -> _Variant:
+        content = None
+        if stat_result.st_size <= self.memory_max_size:
+            with open(path, "rb") as file:
+                content = file.read()
+        return _Variant(path, stat_result, content)
+
+    def _load(self, full_path: str, stat_result: os.stat_result) -> _CachedFile:
+        variants = {None: self._variant(full_path, stat_result)}
+        for encoding, suffix in SIBLINGS.items():
+            try:
+                sibling = os.stat(full_path + suffix)
+            except OSError:
+                continue
+            # A sibling older than the file is left over from a previous build
+            if stat.S_ISREG(sibling.st_mode) and (
+                sibling.st_mtime_ns >= stat_result.st_mtime_ns
+            ):
+                variants[encoding] = self._variant(full_path + suffix, sibling)
+
+        return _CachedFile(
+            mtime_ns=stat_result.st_mtime_ns,
+            size=stat_result.st_size,
+            media_type=guess_type(full_path)[0] or "text/plain",
+            variants=variants,
+        )
+
+    def lookup_path(self, path: str) -> tuple[str, os.stat_result | None]:
+        # Runs in a worker thread, so this is where the files are (re)loaded.
+        full_path, stat_result = super().lookup_path(path)
+        if stat_result is not None and stat.S_ISREG(stat_result.st_mode):
+            cached = self._files.get(full_path)
+            if cached is None or (cached.mtime_ns, cached.size) != (
+                stat_result.st_mtime_ns,
+                stat_result.st_size,
+            ):
+                self._files[full_path] = self._load(full_path, stat_result)
+
+        return full_path, stat_result
+
+    def file_response(
+        self,
+        full_path: str,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        cached = self._files.get(str(full_path))
+        if cached is None:
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        request_headers = Headers(scope=scope)
+        encoding = negotiate(
+            request_headers.get("accept-encoding", ""),
+            [encoding for encoding in cached.variants if encoding is not None],
+        )
+        variant = cached.variants[encoding]
+
+        relative_path = os.path.relpath(full_path, self.directory)
+        headers = {
+            "Cache-Control": IMMUTABLE
+            if HASHED_NAME.search(relative_path.replace(os.sep, "/"))
+            else REVALIDATE
+        }
+        if len(cached.variants) > 1:
+            headers["Vary"] = "Accept-Encoding"
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+
+        if variant.content is None:
+            response = FileResponse(
+                variant.path,
+                status_code=status_code,
+                headers=headers,
+                media_type=cached.media_type,
+                stat_result=variant.stat_result,
+            )
+        else:
+            # The same validators as FileResponse
+            mtime, size = variant.stat_result.st_mtime, variant.stat_result.st_size
+            etag = hashlib.md5(f"{mtime}-{size}".encode(), usedforsecurity=False)
+            headers["ETag"] = f'"{etag.hexdigest()}"'
+            headers["Last-Modified"] = formatdate(mtime, usegmt=True)
+            response = Response(
+                variant.content,
+                status_code=status_code,
+                headers=headers,
+                media_type=cached.media_type,
+            )
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -1,13 +1,36 @@
 from datetime import datetime
 
 from db import Base
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import BigInteger, ForeignKey, Index, func, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 
 class Timelog(Base):
     __tablename__ = "timelog"
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        Index(
+            "ix_timelog_created_at_id_live",
+            "created_at",
+            "id",
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
+        Index(
+            "ix_timelog_form211_id_arrival_at_live",
+            "form211_id",
+            "arrival_at",
+            "id",
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
+        Index("ix_timelog_form211_id_change_xid_id", "form211_id", "change_xid", "id"),
+        Index("ix_timelog_change_xid_id", "change_xid", "id"),
+        Index(
+            "ix_timelog_form211_id_sar_id_open",
+            "form211_id",
+            "sar_id",
+            postgresql_where=text("departure_at IS NULL AND deleted_at IS NULL"),
+        ),
+        {"extend_existing": True},
+    )
 
     """
     id, auto increment id just for db.
@@ -38,6 +61,11 @@ class Timelog(Base):
         server_default=func.now(), onupdate=func.now(), nullable=False
     )
     deleted_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    # The transaction that last wrote the row, set by the timelog_set_change_xid
+    # trigger. The change feeds are ordered on it.
+    change_xid: Mapped[int] = mapped_column(
+        BigInteger, server_default=text("0"), nullable=False
+    )
 
     def __repr__(self) -> str:
         return f"Timelog(id={self.id})"
@@ -1,6 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
+from pagination import CountMode
 from pydantic import BaseModel
 
 
@@ -54,8 +55,33 @@ class ListTimelogResponseItem(BaseModel):
 
 
 class ListTimelogResponse(BaseModel):
-    count: int
+    count: Optional[int]
+    count_mode: CountMode
     items: list[ListTimelogResponseItem]
+    next_cursor: Optional[str] = None
+
+
+class TimelogChangeItem(BaseModel):
+    id: int
+    form211_id: int
+    sar_id: int
+    created_by: Optional[int]
+    name: str
+    resource_type: str
+    arrival_at: Optional[datetime]
+    departure_at: Optional[datetime]
+    created_at: datetime
+    updated_at: datetime
+    # Set on a tombstone: the entry was deleted, drop it.
+    deleted_at: Optional[datetime]
+
+
+class TimelogChangesResponse(BaseModel):
+    items: list[TimelogChangeItem]
+    # Send it as since on the next sync.
+    watermark: Optional[str]
+    # There are more changes than the limit, sync again right away.
+    has_more: bool
 
 
 class UpdateTimelogRequest(BaseModel):
@@ -1,8 +1,22 @@
 from typing import Annotated
 
 from db import get_async_db_session
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func, select
+from fastapi import APIRouter, Depends, HTTPException, Response
+from pagination import (
+    DEFAULT_LIMIT,
+    After,
+    Count,
+    CountMode,
+    Limit,
+    Since,
+    get_count,
+    next_changes,
+    next_page,
+    paginate,
+    paginate_changes,
+)
+from serialization import json_response, row_items
+from sqlalchemy import func, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from timelog import models
 from timelog.routes import schemas
@@ -16,18 +30,36 @@ async def post_create_timelog(
     db: Annotated[AsyncSession, Depends(get_async_db_session)],
     request_data: schemas.CreateTimelogRequest,
 ) -> schemas.CreateTimelogResponse:
-    timelog = models.Timelog(
-        form211_id=request_data.form211_id,
-        name=request_data.name,
-        created_by=request_data.created_by,
-        sar_id=request_data.sar_id,
-        resource_type=request_data.resource_type,
-        arrival_at=request_data.arrival_at,
-        departure_at=request_data.departure_at,
+    values = {
+        "form211_id": request_data.form211_id,
+        "name": request_data.name,
+        "created_by": request_data.created_by,
+        "sar_id": request_data.sar_id,
+        "resource_type": request_data.resource_type,
+        "departure_at": request_data.departure_at,
+    }
+    # Without an arrival time the server default, now, is used.
+    if request_data.arrival_at is not None:
+        values["arrival_at"] = request_data.arrival_at
+
+    stmt = (
+        insert(models.Timelog)
+        .values(values)
+        .returning(
+            models.Timelog.id,
+            models.Timelog.form211_id,
+            models.Timelog.created_by,
+            models.Timelog.name,
+            models.Timelog.sar_id,
+            models.Timelog.resource_type,
+            models.Timelog.arrival_at,
+            models.Timelog.departure_at,
+            models.Timelog.created_at,
+            models.Timelog.updated_at,
+        )
     )
-    db.add(timelog)
+    timelog = (await db.execute(stmt)).one()
     await db.commit()
-    await db.refresh(timelog)
 
     return schemas.CreateTimelogResponse(
         id=timelog.id,
@@ -43,6 +75,52 @@ async def post_create_timelog(
     )
 
 
+# Registered before /{timelog_id}, which would take "changes" for an id.
+@router.get(
+    "/changes",
+    summary="Sync the changes to all Time Entries since a watermark",
+    response_model=schemas.TimelogChangesResponse,
+)
+async def get_timelog_changes(
+    db: Annotated[AsyncSession, Depends(get_async_db_session)],
+    since: Since = None,
+    limit: Limit = DEFAULT_LIMIT,
+) -> Response:
+    stmt = select(
+        models.Timelog.id,
+        models.Timelog.created_by,
+        models.Timelog.form211_id,
+        models.Timelog.name,
+        models.Timelog.sar_id,
+        models.Timelog.resource_type,
+        models.Timelog.arrival_at,
+        models.Timelog.departure_at,
+        models.Timelog.created_at,
+        models.Timelog.updated_at,
+        models.Timelog.deleted_at,
+        models.Timelog.change_xid,
+    )
+    page_stmt = paginate_changes(
+        stmt,
+        models.Timelog.change_xid,
+        models.Timelog.id,
+        limit,
+        since,
+    )
+
+    result_rows, watermark, has_more = next_changes(
+        (await db.execute(page_stmt)).all(), limit, since
+    )
+
+    return json_response(
+        {
+            "items": row_items(schemas.TimelogChangeItem, result_rows),
+            "watermark": watermark,
+            "has_more": has_more,
+        }
+    )
+
+
 @router.get("/{timelog_id}", summary="Retrieve a time entry")
 async def get_timelog(
     db: Annotated[AsyncSession, Depends(get_async_db_session)],
@@ -80,20 +158,64 @@ async def get_timelog(
     )
 
 
-@router.get("", summary="List all Time Entries")
+@router.get(
+    "",
+    summary="List all Time Entries",
+    response_model=schemas.ListTimelogResponse,
+)
 async def get_timelogs(
-    db: Annotated[AsyncSession, Depends(get_async_db_session)]
-) -> schemas.ListTimelogResponse:
-    count_stmt = select(func.count(models.Timelog.id)).where(
-        models.Timelog.deleted_at.is_(None)
+    db: Annotated[AsyncSession, Depends(get_async_db_session)],
+    limit: Limit = DEFAULT_LIMIT,
+    after: After = None,
+    count: Count = CountMode.exact,
+) -> Response:
+    stmt = select(
+        models.Timelog.id,
+        models.Timelog.created_by,
+        models.Timelog.form211_id,
+        models.Timelog.name,
+        models.Timelog.sar_id,
+        models.Timelog.resource_type,
+        models.Timelog.arrival_at,
+        models.Timelog.departure_at,
+        models.Timelog.created_at,
+        models.Timelog.updated_at,
+    ).where(models.Timelog.deleted_at.is_(None))
+    page_stmt = paginate(
+        stmt,
+        models.Timelog.created_at,
+        models.Timelog.id,
+        limit,
+        after,
     )
-    count_result = (await db.execute(count_stmt)).scalar() or 0
 
+    result_rows, next_cursor = next_page((await db.execute(page_stmt)).all(), limit)
+    count_result = await get_count(db, count, stmt, after)
+
+    return json_response(
+        {
+            "count": count_result,
+            "count_mode": count,
+            "items": row_items(schemas.ListTimelogResponseItem, result_rows),
+            "next_cursor": next_cursor,
+        }
+    )
+
+
+@router.put("/{timelog_id}", summary="Update a Time Entry")
+async def put_timelog(
+    db: Annotated[AsyncSession, Depends(get_async_db_session)],
+    timelog_id: int,
+    request_data: schemas.UpdateTimelogRequest,
+) -> schemas.UpdateTimelogResponse:
     stmt = (
-        select(
+        update(models.Timelog)
+        .where(models.Timelog.id == timelog_id, models.Timelog.deleted_at.is_(None))
+        .values(name=request_data.name)
+        .returning(
             models.Timelog.id,
-            models.Timelog.created_by,
             models.Timelog.form211_id,
+            models.Timelog.created_by,
             models.Timelog.name,
             models.Timelog.sar_id,
             models.Timelog.resource_type,
@@ -102,50 +224,14 @@ async def get_timelogs(
             models.Timelog.created_at,
             models.Timelog.updated_at,
         )
-        .where(models.Timelog.deleted_at.is_(None))
-        .order_by(models.Timelog.created_at.desc())
-    )
-
-    result_rows = (await db.execute(stmt)).all()
-
-    return schemas.ListTimelogResponse(
-        count=count_result,
-        items=[
-            schemas.ListTimelogResponseItem(
-                id=row.id,
-                created_by=row.created_by,
-                form211_id=row.form211_id,
-                name=row.name,
-                sar_id=row.sar_id,
-                resource_type=row.resource_type,
-                arrival_at=row.arrival_at,
-                departure_at=row.departure_at,
-                created_at=row.created_at,
-                updated_at=row.updated_at,
-            )
-            for row in result_rows
-        ],
-    )
-
-
-@router.put("/{timelog_id}", summary="Update a Time Entry")
-async def put_timelog(
-    db: Annotated[AsyncSession, Depends(get_async_db_session)],
-    timelog_id: int,
-    request_data: schemas.UpdateTimelogRequest,
-) -> schemas.UpdateTimelogResponse:
-    stmt = select(models.Timelog).where(
-        models.Timelog.id == timelog_id, models.Timelog.deleted_at.is_(None)
+        .execution_options(synchronize_session=False)
     )
 
-    timelog = (await db.execute(stmt)).scalar()
+    timelog = (await db.execute(stmt)).first()
     if timelog is None:
         raise HTTPException(status_code=404, detail="Timelog not found")
 
-    timelog.name = request_data.name
-
     await db.commit()
-    await db.refresh(timelog)
 
     return schemas.UpdateTimelogResponse(
         id=timelog.id,
@@ -166,17 +252,16 @@ async def delete_timelog(
     db: Annotated[AsyncSession, Depends(get_async_db_session)],
     timelog_id: int,
 ) -> None:
-    stmt = select(models.Timelog).where(
-        models.Timelog.id == timelog_id,
-        models.Timelog.deleted_at.is_(None),
+    stmt = (
+        update(models.Timelog)
+        .where(models.Timelog.id == timelog_id, models.Timelog.deleted_at.is_(None))
+        .values(deleted_at=func.now())
+        .returning(models.Timelog.id)
+        .execution_options(synchronize_session=False)
     )
 
-    timelog = (await db.execute(stmt)).scalar()
-
-    if timelog is None:
+    if (await db.execute(stmt)).first() is None:
         raise HTTPException(status_code=404, detail="Timelog not found")
 
-    timelog.deleted_at = func.now()
     await db.commit()
-    await db.refresh(timelog)
     return None
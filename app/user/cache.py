@@ -0,0 +1,101 @@
+"""In-process cache of sar id to user lookups.
+
+Sign in and sign out look a member up by sar id on every request, while the roster
+itself rarely changes. The cache is write-through invalidated by the user routes of
+this process; other worker processes only see a change once their entry expires,
+so the TTL bounds how stale a lookup can be.
+"""
+import time
+from collections import OrderedDict
+from typing import Iterable
+
+import settings
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from user import models
+
+
+class MemberCache:
+    """A bounded LRU of sar id to user id with a TTL on every entry.
+
+    A user id of None records that no live user has the sar id, so repeated
+    guest sign ins are cached too.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[int, tuple[float, int | None]] = OrderedDict()
+        self._sar_ids_by_user_id: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_many(self, sar_ids: Iterable[int]) -> tuple[dict[int, int | None], set]:
+        """Split sar ids into the cached user ids and the sar ids to look up."""
+        found: dict[int, int | None] = {}
+        missing = set()
+        now = time.monotonic()
+        for sar_id in sar_ids:
+            entry = self._entries.get(sar_id)
+            if entry is None or entry[0] < now:
+                missing.add(sar_id)
+                continue
+
+            self._entries.move_to_end(sar_id)
+            found[sar_id] = entry[1]
+
+        self.hits += len(found)
+        self.misses += len(missing)
+        return found, missing
+
+    def put(self, sar_id: int, user_id: int | None) -> None:
+        self.invalidate(sar_id=sar_id)
+        self._entries[sar_id] = (time.monotonic() + self.ttl_seconds, user_id)
+        if user_id is not None:
+            self._sar_ids_by_user_id[user_id] = sar_id
+
+        while len(self._entries) > self.max_size:
+            _, (_, evicted_user_id) = self._entries.popitem(last=False)
+            self._sar_ids_by_user_id.pop(evicted_user_id, None)
+
+    def invalidate(self, sar_id: int | None = None, user_id: int | None = None) -> None:
+        """Drop the entry of a sar id and the entry that points at a user."""
+        if user_id is not None:
+            self._entries.pop(self._sar_ids_by_user_id.pop(user_id, None), None)
+
+        if sar_id is not None:
+            _, cached_user_id = self._entries.pop(sar_id, (None, None))
+            self._sar_ids_by_user_id.pop(cached_user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._sar_ids_by_user_id.clear()
+
+
+member_cache = MemberCache(
+    settings.MEMBER_CACHE_SIZE, settings.MEMBER_CACHE_TTL_SECONDS
+)
+
+
+async def get_member_ids(
+    db: AsyncSession, sar_ids: Iterable[int]
+) -> dict[int, int | None]:
+    """Map sar ids to the id of the live user that has them, None if there is none.
+
+    Only the sar ids that are not cached are looked up, all in one query.
+    """
+    member_ids, missing = member_cache.get_many(set(sar_ids))
+    if missing:
+        stmt = select(models.User.sar_id, models.User.id).where(
+            models.User.sar_id.in_(missing),
+            models.User.deleted_at.is_(None),
+        )
+        found = dict((await db.execute(stmt)).tuples().all())
+        for sar_id in missing:
+            member_ids[sar_id] = found.get(sar_id)
+            member_cache.put(sar_id, found.get(sar_id))
+
+    return member_ids
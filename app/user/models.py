@@ -2,13 +2,28 @@ from datetime import datetime
 from typing import List
 
 from db import Base
-from sqlalchemy import func
+from sqlalchemy import Index, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 
 class User(Base):
     __tablename__ = "users"
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        Index(
+            "ix_users_created_at_id_live",
+            "created_at",
+            "id",
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
+        Index(
+            "ix_users_sar_id_live",
+            "sar_id",
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
+        # ix_users_sar_id_trgm_live is only in migration 003, which skips it on
+        # servers without pg_trgm.
+        {"extend_existing": True},
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     sar_id: Mapped[int] = mapped_column(default=0, nullable=True)
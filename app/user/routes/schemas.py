@@ -1,6 +1,7 @@
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
 
+from pagination import CountMode
 from pydantic import BaseModel
 
 
@@ -42,8 +43,25 @@ class ListUsersResponseItem(BaseModel):
 
 
 class ListUsersResponse(BaseModel):
-    count: int
+    count: Optional[int]
+    count_mode: CountMode
     items: list[ListUsersResponseItem]
+    next_cursor: Optional[str] = None
+
+
+class SearchUsersResponseItem(BaseModel):
+    id: int
+    name: str
+    sar_id: Optional[int]
+    email: str
+    resource_type: str
+    created_at: datetime
+    updated_at: datetime
+    match: Literal["exact", "prefix", "substring"]
+
+
+class SearchUsersResponse(BaseModel):
+    items: list[SearchUsersResponseItem]
 
 
 class UpdateUserRequest(BaseModel):
@@ -1,30 +1,130 @@
 from typing import Annotated
 
 from db import get_async_db_session
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import String, func, select
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from pagination import (
+    DEFAULT_LIMIT,
+    After,
+    Count,
+    CountMode,
+    Limit,
+    get_count,
+    next_page,
+    paginate,
+)
+from serialization import json_response, row_items
+from sqlalchemy import (
+    Select,
+    Text,
+    cast,
+    func,
+    insert,
+    literal_column,
+    not_,
+    or_,
+    select,
+    union_all,
+    update,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 from user import models
+from user.cache import member_cache
 from user.routes import schemas
 
 # /api/v1/user
 router = APIRouter()
 
+SAR_ID_MAX = 2**31 - 1
+SEARCH_MATCHES = ("exact", "prefix", "substring")
+
+
+def _sar_id_search_stmt(sar_id: str, limit: int) -> Select:
+    """Build the ranked SAR ID search: exact match, then prefix, then substring.
+
+    sar_id is an integer column, so the members whose SAR ID starts with "12" are
+    the ones in the ranges 120-129, 1200-1299 and so on. That keeps the exact and
+    prefix matches on the ix_users_sar_id_live index, and only the substring
+    matches need the trigram index. Each rank is limited on its own so the search
+    stays bounded however many members match.
+    """
+    branches = []
+    earlier_matches = []
+    # No SAR ID is written with a leading zero, so only "0" itself can be exact.
+    # A value out of the column's range matches no SAR ID exactly or as a prefix,
+    # and comparing the column to it would fail.
+    value = int(sar_id)
+    if (sar_id == "0" or not sar_id.startswith("0")) and (
+        -SAR_ID_MAX - 1 <= value <= SAR_ID_MAX
+    ):
+        earlier_matches.append(models.User.sar_id == value)
+
+        scale = 10
+        prefix_ranges = []
+        while 0 < value * scale <= SAR_ID_MAX:
+            prefix_ranges.append(
+                models.User.sar_id.between(
+                    value * scale, min((value + 1) * scale - 1, SAR_ID_MAX)
+                )
+            )
+            scale *= 10
+        if prefix_ranges:
+            earlier_matches.append(or_(*prefix_ranges))
+
+    substring = cast(models.User.sar_id, Text).contains(sar_id)
+    if earlier_matches:
+        substring = substring & not_(or_(*earlier_matches))
+
+    for rank, criterion in enumerate([*earlier_matches, substring]):
+        branches.append(
+            select(
+                models.User.id,
+                models.User.name,
+                models.User.sar_id,
+                models.User.email,
+                models.User.resource_type,
+                models.User.created_at,
+                models.User.updated_at,
+                literal_column(str(rank)).label("rank"),
+            )
+            .where(criterion, models.User.deleted_at.is_(None))
+            .order_by(models.User.sar_id, models.User.id)
+            .limit(limit)
+        )
+
+    matches = union_all(*branches).subquery()
+    return (
+        select(matches)
+        .order_by(matches.c.rank, matches.c.sar_id, matches.c.id)
+        .limit(limit)
+    )
+
 
 @router.post("", summary="Create a new user")
 async def post_create_user(
     db: Annotated[AsyncSession, Depends(get_async_db_session)],
     request_data: schemas.CreateUserRequest,
 ) -> schemas.CreateUserResponse:
-    user = models.User(
-        name=request_data.name,
-        email=request_data.email,
-        resource_type=request_data.resource_type,
-        sar_id=request_data.sar_id,
+    stmt = (
+        insert(models.User)
+        .values(
+            name=request_data.name,
+            email=request_data.email,
+            resource_type=request_data.resource_type,
+            sar_id=request_data.sar_id,
+        )
+        .returning(
+            models.User.id,
+            models.User.name,
+            models.User.sar_id,
+            models.User.email,
+            models.User.resource_type,
+            models.User.created_at,
+            models.User.updated_at,
+        )
     )
-    db.add(user)
+    user = (await db.execute(stmt)).one()
     await db.commit()
-    await db.refresh(user)
+    member_cache.invalidate(sar_id=user.sar_id)
 
     return schemas.CreateUserResponse(
         id=user.id,
@@ -37,6 +137,35 @@ async def post_create_user(
     )
 
 
+# Registered ahead of /{user_id} so that "search" is not read as a user id.
+@router.get("/search", summary="Search users by their sar id")
+async def get_search_users(
+    db: Annotated[AsyncSession, Depends(get_async_db_session)],
+    sar_id: Annotated[
+        str,
+        Query(pattern=r"^\d{1,10}$", description="The full sar id or part of it"),
+    ],
+    limit: Annotated[int, Query(ge=1, le=50)] = 10,
+) -> schemas.SearchUsersResponse:
+    result_rows = (await db.execute(_sar_id_search_stmt(sar_id, limit))).all()
+
+    return schemas.SearchUsersResponse(
+        items=[
+            schemas.SearchUsersResponseItem(
+                id=row.id,
+                name=row.name,
+                sar_id=row.sar_id,
+                email=row.email,
+                resource_type=row.resource_type,
+                created_at=row.created_at,
+                updated_at=row.updated_at,
+                match=SEARCH_MATCHES[row.rank],
+            )
+            for row in result_rows
+        ]
+    )
+
+
 @router.get("/{user_id}", summary="Retrieve a user")
 async def get_user(
     db: Annotated[AsyncSession, Depends(get_async_db_session)],
@@ -68,47 +197,34 @@ async def get_user(
     )
 
 
-@router.get("", summary="List all users")
+@router.get("", summary="List all users", response_model=schemas.ListUsersResponse)
 async def get_users(
-    db: Annotated[AsyncSession, Depends(get_async_db_session)]
-) -> schemas.ListUsersResponse:
-    count_stmt = select(func.count(models.User.id)).where(
-        models.User.deleted_at.is_(None)
-    )
-    count_result = (await db.execute(count_stmt)).scalar() or 0
+    db: Annotated[AsyncSession, Depends(get_async_db_session)],
+    limit: Limit = DEFAULT_LIMIT,
+    after: After = None,
+    count: Count = CountMode.exact,
+) -> Response:
+    stmt = select(
+        models.User.id,
+        models.User.name,
+        models.User.sar_id,
+        models.User.email,
+        models.User.resource_type,
+        models.User.created_at,
+        models.User.updated_at,
+    ).where(models.User.deleted_at.is_(None))
+    page_stmt = paginate(stmt, models.User.created_at, models.User.id, limit, after)
 
-    stmt = (
-        select(
-            models.User.id,
-            models.User.name,
-            models.User.sar_id,
-            models.User.email,
-            models.User.resource_type,
-            models.User.created_at,
-            models.User.updated_at,
-        )
-        .where(models.User.deleted_at.is_(None))
-        .order_by(models.User.created_at.desc())
-    )
+    result_rows, next_cursor = next_page((await db.execute(page_stmt)).all(), limit)
+    count_result = await get_count(db, count, stmt, after)
 
-    result_rows = (await db.execute(stmt)).all()
-    print("*******************")
-    print(result_rows)
-    print("*******************")
-    return schemas.ListUsersResponse(
-        count=count_result,
-        items=[
-            schemas.ListUsersResponseItem(
-                id=row.id,
-                name=row.name,
-                sar_id=row.sar_id,
-                email=row.email,
-                resource_type=row.resource_type,
-                created_at=row.created_at,
-                updated_at=row.updated_at,
-            )
-            for row in result_rows
-        ],
+    return json_response(
+        {
+            "count": count_result,
+            "count_mode": count,
+            "items": row_items(schemas.ListUsersResponseItem, result_rows),
+            "next_cursor": next_cursor,
+        }
     )
 
 
@@ -118,21 +234,33 @@ async def put_user(
     user_id: int,
     request_data: schemas.UpdateUserRequest,
 ) -> schemas.UpdateUserResponse:
-    stmt = select(models.User).where(
-        models.User.id == user_id, models.User.deleted_at.is_(None)
+    stmt = (
+        update(models.User)
+        .where(models.User.id == user_id, models.User.deleted_at.is_(None))
+        .values(
+            name=request_data.name,
+            resource_type=request_data.resource_type,
+            sar_id=request_data.sar_id,
+            email=request_data.email,
+        )
+        .returning(
+            models.User.id,
+            models.User.name,
+            models.User.sar_id,
+            models.User.email,
+            models.User.resource_type,
+            models.User.created_at,
+            models.User.updated_at,
+        )
+        .execution_options(synchronize_session=False)
     )
 
-    user = (await db.execute(stmt)).scalar()
+    user = (await db.execute(stmt)).first()
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    user.name = request_data.name
-    user.resource_type = request_data.resource_type
-    user.sar_id = request_data.sar_id
-    user.email = request_data.email
-
     await db.commit()
-    await db.refresh(user)
+    member_cache.invalidate(sar_id=user.sar_id, user_id=user.id)
 
     return schemas.UpdateUserResponse(
         id=user.id,
@@ -150,19 +278,20 @@ async def delete_user(
     db: Annotated[AsyncSession, Depends(get_async_db_session)],
     user_id: int,
 ) -> None:
-    stmt = select(models.User).where(
-        models.User.id == user_id,
-        models.User.deleted_at.is_(None),
+    stmt = (
+        update(models.User)
+        .where(models.User.id == user_id, models.User.deleted_at.is_(None))
+        .values(deleted_at=func.now())
+        .returning(models.User.id, models.User.sar_id)
+        .execution_options(synchronize_session=False)
     )
 
-    user = (await db.execute(stmt)).scalar()
-
+    user = (await db.execute(stmt)).first()
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    user.deleted_at = func.now()
     await db.commit()
-    await db.refresh(user)
+    member_cache.invalidate(sar_id=user.sar_id, user_id=user.id)
     return None
 
 
@@ -171,30 +300,18 @@ async def get_user_by_sar_id(
     db: Annotated[AsyncSession, Depends(get_async_db_session)],
     sar_id: int,
 ) -> schemas.RetrieveUserResponse:
-    stmt = select(
-        models.User.id,
-        models.User.name,
-        models.User.sar_id,
-        models.User.email,
-        models.User.resource_type,
-        models.User.created_at,
-        models.User.updated_at,
-    ).where(
-        func.cast(models.User.sar_id, String).contains(str(sar_id)),
-        models.User.deleted_at.is_(None),
-    )
+    stmt = _sar_id_search_stmt(str(sar_id), limit=1)
     result_row = (await db.execute(stmt)).first()
 
     if result_row is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    mapped_row = result_row._mapping
     return schemas.RetrieveUserResponse(
-        id=mapped_row[models.User.id],
-        name=mapped_row[models.User.name],
-        sar_id=mapped_row[models.User.sar_id],
-        email=mapped_row[models.User.email],
-        resource_type=mapped_row[models.User.resource_type],
-        created_at=mapped_row[models.User.created_at],
-        updated_at=mapped_row[models.User.updated_at],
+        id=result_row.id,
+        name=result_row.name,
+        sar_id=result_row.sar_id,
+        email=result_row.email,
+        resource_type=result_row.resource_type,
+        created_at=result_row.created_at,
+        updated_at=result_row.updated_at,
     )
@@ -0,0 +1,86 @@
+"""Warm up a worker's connection pool before it reports ready.
+
+The first requests on a fresh connection pay for the TCP and auth handshakes,
+asyncpg's type introspection and the preparation of every statement they run.
+When the app starts, warm_up opens WARMUP_CONNECTIONS connections at once so the
+pool keeps them, then calls the hot GET endpoints in process as many times
+each. The pool hands out its idle connections first in first out, so every
+connection prepares every one of their statements. The requests are marked so
+that they stay out of the metrics.
+
+/ready reports 503 until the warm-up succeeded, load balancers and orchestrators
+should route traffic on it, /health only tells that the process is up. A failed
+warm-up (the database is not up yet) is retried.
+"""
+import asyncio
+from contextlib import AsyncExitStack
+
+import httpx
+import settings
+from db import engine
+from metrics import WARMUP_SCOPE_KEY
+from sqlalchemy import text
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# Any ids will do, the statements are the same
+HOT_PATHS = (
+    "/api/v1/user?limit=1",
+    "/api/v1/user/search?sar_id=0",
+    "/api/v1/211?limit=1",
+    "/api/v1/211/0/arrivals",
+    "/api/v1/timelog?limit=1",
+)
+RETRY_SECONDS = 5
+
+
+class Readiness:
+    def __init__(self) -> None:
+        self.ready = False
+        self.error: str | None = None
+
+
+readiness = Readiness()
+
+
+async def _open_connections(count: int) -> None:
+    # Hold them all at once so that the pool opens as many.
+    async with AsyncExitStack() as stack:
+        connections = [
+            await stack.enter_async_context(engine.connect()) for _ in range(count)
+        ]
+        for connection in connections:
+            await connection.execute(text("SELECT 1"))
+
+
+def _marked(app: ASGIApp) -> ASGIApp:
+    async def marked(scope: Scope, receive: Receive, send: Send) -> None:
+        await app({**scope, WARMUP_SCOPE_KEY: True}, receive, send)
+
+    return marked
+
+
+async def warm_up(app: ASGIApp) -> None:
+    count = min(settings.WARMUP_CONNECTIONS, settings.DB_POOL_SIZE)
+    await _open_connections(count)
+
+    transport = httpx.ASGITransport(app=_marked(app))
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://warmup"
+    ) as client:
+        for path in HOT_PATHS:
+            for _ in range(count):
+                response = await client.get(path)
+                if response.status_code >= 500:
+                    raise RuntimeError(f"GET {path} answered {response.status_code}")
+
+
+async def warm_up_until_ready(app: ASGIApp) -> None:
+    while True:
+        try:
+            await asyncio.wait_for(warm_up(app), settings.WARMUP_TIMEOUT)
+        except Exception as err:
+            readiness.error = repr(err)
+            await asyncio.sleep(RETRY_SECONDS)
+        else:
+            readiness.ready, readiness.error = True, None
+            return
@@ -0,0 +1,72 @@
+"""Shared helpers for the benchmarks.
+
+The benchmarks import the application the same way the server does, so they need
+app/ on the path and the PG_* environment variables (or a .env file) pointing at a
+migrated database. Run them from the repository root, for example
+``python -m bench.write_paths``.
+"""
+import math
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "app"))
+
+import asyncpg  # noqa: E402
+import settings  # noqa: E402
+from db import engine  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+
+async def connect() -> asyncpg.Connection:
+    """A plain asyncpg connection to the app's database, for seeding with COPY."""
+    return await asyncpg.connect(
+        host=settings.PG_HOST,
+        port=int(settings.PG_PORT),
+        user=settings.PG_USER,
+        password=settings.PG_PASSWORD,
+        database=settings.PG_DB,
+        ssl=False,
+    )
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    ordered = sorted(samples)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class Recorder:
+    """Collect the latency and statement count of each request by endpoint."""
+
+    def __init__(self) -> None:
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.statements: dict[str, list[int]] = defaultdict(list)
+        self._statement_count = 0
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def count_statement(conn, cursor, statement, parameters, context, many):
+            self._statement_count += 1
+
+    @contextmanager
+    def measure(self, endpoint: str) -> Iterator[None]:
+        self._statement_count = 0
+        start = time.perf_counter()
+        yield
+        self.latencies[endpoint].append(time.perf_counter() - start)
+        self.statements[endpoint].append(self._statement_count)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        return {
+            endpoint: {
+                "requests": len(samples),
+                "statements_per_request": sum(self.statements[endpoint]) / len(samples),
+                "p50_ms": round(percentile(samples, 50) * 1000, 3),
+                "p99_ms": round(percentile(samples, 99) * 1000, 3),
+            }
+            for endpoint, samples in self.latencies.items()
+        }
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The micro-benchmarks import the app's modules but never touch the database.
+sys.path.insert(0, str(Path(__file__).parent.parent / "app"))
@@ -0,0 +1,148 @@
+"""Compare the production launcher with the old uvicorn --reload command.
+
+Starts the server with each command, times how long it takes to answer
+/health, loads it with concurrent requests for a while (a mix of the health
+check, the user list and the Form 211 list), then sends SIGTERM and times the
+shutdown. Prints a JSON report with the startup and shutdown seconds, the
+throughput and the p50/p95/p99 latency of each launcher.
+
+    python -m bench.launchers --duration 20 --concurrency 50
+
+The load generator runs on the same machine, give the server most of the CPUs
+(or use --workers to fix the number of serve.py workers) for a fair comparison.
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+from bench.common import percentile
+
+APP_DIR = Path(__file__).parent.parent / "app"
+PATHS = ("/health", "/api/v1/user?limit=50", "/api/v1/211?limit=50")
+
+
+def launch_commands(host: str, port: int) -> dict[str, list[str]]:
+    return {
+        "uvicorn --reload": [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--reload",
+            "--host",
+            host,
+            "--port",
+            str(port),
+        ],
+        "serve.py": [sys.executable, "serve.py"],
+    }
+
+
+async def wait_until_up(client: httpx.AsyncClient, timeout: float) -> float:
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return time.perf_counter() - start
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.05)
+    raise RuntimeError("The server did not start")
+
+
+async def load(
+    client: httpx.AsyncClient, duration: float, concurrency: int
+) -> tuple[list[float], int]:
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def user(offset: int) -> None:
+        nonlocal errors
+        i = offset
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await client.get(PATHS[i % len(PATHS)])
+                if response.status_code != 200:
+                    errors += 1
+            except httpx.TransportError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+            i += 1
+
+    await asyncio.gather(*(user(i) for i in range(concurrency)))
+    return latencies, errors
+
+
+async def bench(name: str, command: list[str], args: argparse.Namespace) -> dict:
+    env = {**os.environ, "BIND": f"{args.host}:{args.port}"}
+    if args.workers:
+        env["WEB_CONCURRENCY"] = str(args.workers)
+
+    process = subprocess.Popen(
+        command,
+        cwd=APP_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        # So that SIGTERM reaches the reloader's and gunicorn's children too
+        start_new_session=True,
+    )
+    limits = httpx.Limits(max_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://{args.host}:{args.port}", limits=limits, timeout=30
+        ) as client:
+            startup = await wait_until_up(client, timeout=60)
+            # Warm up the pools before measuring
+            await load(client, 2, args.concurrency)
+            latencies, errors = await load(client, args.duration, args.concurrency)
+    finally:
+        start = time.perf_counter()
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=60)
+        shutdown = time.perf_counter() - start
+
+    return {
+        "command": " ".join(["python", *command[1:]]),
+        "startup_seconds": round(startup, 3),
+        "shutdown_seconds": round(shutdown, 3),
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / args.duration, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    return {
+        name: await bench(name, command, args)
+        for name, command in launch_commands(args.host, args.port).items()
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=0, help="serve.py workers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""Load test of an incident surge against a seeded database.
+
+Seeds a realistic dataset with COPY (users, past Form 211s and their timelogs),
+then replays the traffic of a new incident against main:app: members signing in
+in a burst, dashboards polling the arrivals with their ETag, people browsing the
+list endpoints page by page, and finally everyone signed out. Prints a JSON report
+with the throughput and the p50/p95/p99 latency of each endpoint, so that runs of
+two releases on the same hardware can be compared.
+
+    python -m bench.surge --users 5000 --forms 2000 --timelogs 300000
+    python -m bench.surge --skip-seed --arrivals 500 --dashboards 40
+
+The requests go to the app in process unless --base-url points at a running
+server. Either way the PG_* environment variables must point at the database the
+app uses, the seeding connects to it directly.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+import asyncpg
+from httpx import AsyncClient
+from main import app
+
+from bench.common import connect, percentile
+
+RESOURCE_TYPES = ("FSAR", "K9", "EMT", "HAM", "UAS")
+
+
+async def seed(users: int, forms: int, timelogs: int, rng: random.Random) -> dict:
+    """COPY the dataset in and return how long it took."""
+    tag = uuid.uuid4().hex[:8]
+    now = datetime.now(timezone.utc)
+    first_sar_id = rng.randrange(100_000_000, 900_000_000)
+    start = time.perf_counter()
+
+    connection = await connect()
+    try:
+        await connection.copy_records_to_table(
+            "users",
+            columns=("sar_id", "name", "email", "resource_type"),
+            records=(
+                (
+                    first_sar_id + i,
+                    f"Member {first_sar_id + i}",
+                    f"surge-{tag}-{i}@example.com",
+                    rng.choice(RESOURCE_TYPES),
+                )
+                for i in range(users)
+            ),
+        )
+        members = await connection.fetch(
+            "SELECT id, sar_id, name, resource_type FROM users WHERE email LIKE $1",
+            f"surge-{tag}-%",
+        )
+
+        await connection.copy_records_to_table(
+            "form211",
+            columns=("created_by", "name", "operational_period", "created_at"),
+            records=(
+                (
+                    rng.choice(members)["id"],
+                    f"Surge {tag} incident {i}",
+                    rng.randint(1, 5),
+                    now - timedelta(days=rng.uniform(1, 365)),
+                )
+                for i in range(forms)
+            ),
+        )
+        form_rows = await connection.fetch(
+            "SELECT id, created_by, created_at FROM form211 WHERE name LIKE $1",
+            f"Surge {tag} incident %",
+        )
+
+        def timelog_records():
+            for _ in range(timelogs):
+                form = rng.choice(form_rows)
+                member = rng.choice(members)
+                arrival_at = form["created_at"] + timedelta(hours=rng.uniform(0, 48))
+                # Most people have signed out of a past incident
+                departure_at = (
+                    arrival_at + timedelta(hours=rng.uniform(1, 12))
+                    if rng.random() < 0.95
+                    else None
+                )
+                yield (
+                    form["id"],
+                    form["created_by"],
+                    member["sar_id"],
+                    member["name"],
+                    member["resource_type"],
+                    arrival_at,
+                    departure_at,
+                    arrival_at,
+                    departure_at or arrival_at,
+                )
+
+        await connection.copy_records_to_table(
+            "timelog",
+            columns=(
+                "form211_id",
+                "created_by",
+                "sar_id",
+                "name",
+                "resource_type",
+                "arrival_at",
+                "departure_at",
+                "created_at",
+                "updated_at",
+            ),
+            records=timelog_records(),
+        )
+        await connection.execute("ANALYZE users, form211, timelog")
+    finally:
+        await connection.close()
+
+    return {
+        "users": users,
+        "forms": forms,
+        "timelogs": timelogs,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+async def load_members(count: int) -> list[asyncpg.Record]:
+    connection = await connect()
+    try:
+        return await connection.fetch(
+            "SELECT id, sar_id, name FROM users WHERE deleted_at IS NULL "
+            "ORDER BY random() LIMIT $1",
+            count,
+        )
+    finally:
+        await connection.close()
+
+
+async def load_forms(count: int) -> list[int]:
+    connection = await connect()
+    try:
+        rows = await connection.fetch(
+            "SELECT id FROM form211 WHERE deleted_at IS NULL "
+            "ORDER BY random() LIMIT $1",
+            count,
+        )
+        return [row["id"] for row in rows]
+    finally:
+        await connection.close()
+
+
+class LoadRecorder:
+    """Collect the latency and status of each request by endpoint."""
+
+    def __init__(self) -> None:
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    async def call(self, client: AsyncClient, method: str, template: str, **kwargs):
+        url = template.format(**kwargs.pop("path_params", {}))
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        endpoint = f"{method} {template}"
+        self.latencies[endpoint].append(time.perf_counter() - start)
+        self.statuses[endpoint][response.status_code] += 1
+        return response
+
+    def summary(self, seconds: float) -> dict:
+        endpoints = {
+            endpoint: {
+                "requests": len(samples),
+                "statuses": dict(sorted(self.statuses[endpoint].items())),
+                "throughput_rps": round(len(samples) / seconds, 1),
+                "p50_ms": round(percentile(samples, 50) * 1000, 3),
+                "p95_ms": round(percentile(samples, 95) * 1000, 3),
+                "p99_ms": round(percentile(samples, 99) * 1000, 3),
+            }
+            for endpoint, samples in sorted(self.latencies.items())
+        }
+        requests = sum(len(samples) for samples in self.latencies.values())
+        return {
+            "seconds": round(seconds, 3),
+            "requests": requests,
+            "throughput_rps": round(requests / seconds, 1),
+            "endpoints": endpoints,
+        }
+
+
+async def replay(args: argparse.Namespace, rng: random.Random) -> dict:
+    recorder = LoadRecorder()
+    members = await load_members(args.arrivals)
+    past_forms = await load_forms(100)
+    if not members or not past_forms:
+        raise SystemExit("The database has no users or forms, seed it first")
+
+    client_options = (
+        {"base_url": args.base_url}
+        if args.base_url
+        else {"app": app, "base_url": "http://bench"}
+    )
+    async with AsyncClient(timeout=60, **client_options) as client:
+        response = await recorder.call(
+            client,
+            "POST",
+            "/api/v1/211",
+            json={
+                "name": "Surge incident",
+                "created_by": members[0]["id"],
+                "operational_period": 1,
+            },
+        )
+        response.raise_for_status()
+        form211_id = response.json()["id"]
+        burst_done = asyncio.Event()
+        limit = asyncio.Semaphore(args.concurrency)
+
+        async def sign_in(member: asyncpg.Record) -> None:
+            async with limit:
+                await recorder.call(
+                    client,
+                    "POST",
+                    "/api/v1/211/{form211_id}/sign_in",
+                    path_params={"form211_id": form211_id},
+                    json={
+                        "sar_id": member["sar_id"],
+                        "name": member["name"],
+                        "created_by": members[0]["id"],
+                    },
+                )
+
+        async def burst() -> None:
+            try:
+                await asyncio.gather(*(sign_in(member) for member in members))
+            finally:
+                burst_done.set()
+
+        async def dashboard() -> None:
+            etag = None
+            # Tablets do not all poll in step
+            await asyncio.sleep(rng.uniform(0, args.poll_interval))
+            while not burst_done.is_set():
+                headers = {"If-None-Match": etag} if etag else {}
+                response = await recorder.call(
+                    client,
+                    "GET",
+                    "/api/v1/211/{form211_id}/arrivals",
+                    path_params={"form211_id": form211_id},
+                    headers=headers,
+                )
+                etag = response.headers.get("etag", etag)
+                await asyncio.sleep(args.poll_interval)
+
+        async def browser() -> None:
+            paths = ("/api/v1/211", "/api/v1/timelog", "/api/v1/user")
+            while not burst_done.is_set():
+                path = rng.choice(paths)
+                params = {"limit": 50}
+                for _ in range(rng.randint(1, 3)):
+                    response = await recorder.call(client, "GET", path, params=params)
+                    cursor = response.json().get("next_cursor")
+                    if cursor is None:
+                        break
+                    params = {"limit": 50, "after": cursor, "count": "none"}
+
+                await recorder.call(
+                    client,
+                    "GET",
+                    "/api/v1/211/{form211_id}/arrivals",
+                    path_params={"form211_id": rng.choice(past_forms)},
+                )
+                await asyncio.sleep(args.poll_interval)
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            burst(),
+            *(dashboard() for _ in range(args.dashboards)),
+            *(browser() for _ in range(args.browsers)),
+        )
+        await recorder.call(
+            client,
+            "PUT",
+            "/api/v1/211/{form211_id}/sign_out",
+            path_params={"form211_id": form211_id},
+        )
+        seconds = time.perf_counter() - start
+
+    return recorder.summary(seconds)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    rng = random.Random(args.seed)
+    report = {"config": vars(args)}
+    if not args.skip_seed:
+        report["seed"] = await seed(args.users, args.forms, args.timelogs, rng)
+    report["replay"] = await replay(args, rng)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--forms", type=int, default=2000)
+    parser.add_argument("--timelogs", type=int, default=300_000)
+    parser.add_argument("--skip-seed", action="store_true")
+    parser.add_argument("--arrivals", type=int, default=300, help="Members signing in")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--dashboards", type=int, default=30)
+    parser.add_argument("--browsers", type=int, default=5)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--base-url", help="Load a running server instead")
+    parser.add_argument("--seed", type=int, default=211)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Micro-benchmarks of turning selected rows into a list response.
+
+validated is how the list handlers used to answer: a model built per row with
+keyword arguments, returned through the response model annotation. trusted is
+what they do now, see serialization.py. Both go through a FastAPI app so the
+framework's own work is measured, the rows are prebuilt so no database is needed.
+
+    python -m pytest bench/test_serialization.py -p no:cacheprovider --no-cov \
+        --benchmark-group-by=param:rows
+"""
+from datetime import datetime, timedelta, timezone
+from functools import cache
+
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+from pagination import CountMode
+from serialization import json_response, row_items
+from sqlalchemy.engine import Row
+from sqlalchemy.engine.result import IteratorResult, SimpleResultMetaData
+from timelog.routes import schemas
+
+COLUMNS = (
+    "id",
+    "created_by",
+    "form211_id",
+    "name",
+    "sar_id",
+    "resource_type",
+    "arrival_at",
+    "departure_at",
+    "created_at",
+    "updated_at",
+)
+
+
+@cache
+def make_rows(count: int) -> list[Row]:
+    start = datetime(2025, 7, 4, 8, tzinfo=timezone.utc)
+    rows = (
+        (
+            i,
+            1,
+            i // 100,
+            f"Member {i}",
+            100_000 + i,
+            "FSAR",
+            start + timedelta(seconds=i),
+            start + timedelta(hours=8, seconds=i) if i % 3 else None,
+            start + timedelta(seconds=i),
+            start + timedelta(seconds=i),
+        )
+        for i in range(count)
+    )
+    return IteratorResult(SimpleResultMetaData(COLUMNS), rows).all()
+
+
+app = FastAPI()
+
+
+@app.get("/validated/{rows}")
+async def validated(rows: int) -> schemas.ListTimelogResponse:
+    result_rows = make_rows(rows)
+    return schemas.ListTimelogResponse(
+        count=len(result_rows),
+        count_mode=CountMode.exact,
+        items=[
+            schemas.ListTimelogResponseItem(
+                id=row.id,
+                created_by=row.created_by,
+                form211_id=row.form211_id,
+                name=row.name,
+                sar_id=row.sar_id,
+                resource_type=row.resource_type,
+                arrival_at=row.arrival_at,
+                departure_at=row.departure_at,
+                created_at=row.created_at,
+                updated_at=row.updated_at,
+            )
+            for row in result_rows
+        ],
+    )
+
+
+@app.get("/trusted/{rows}", response_model=schemas.ListTimelogResponse)
+async def trusted(rows: int) -> Response:
+    result_rows = make_rows(rows)
+    return json_response(
+        {
+            "count": len(result_rows),
+            "count_mode": CountMode.exact,
+            "items": row_items(schemas.ListTimelogResponseItem, result_rows),
+            "next_cursor": None,
+        }
+    )
+
+
+@pytest.fixture(scope="module")
+def client() -> TestClient:
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.mark.parametrize("rows", [1_000, 10_000, 100_000])
+@pytest.mark.parametrize("path", ["validated", "trusted"])
+def test_list_response(benchmark, client: TestClient, path: str, rows: int) -> None:
+    make_rows(rows)
+    expected = client.get(f"/validated/{rows}").content
+
+    response = benchmark(client.get, f"/{path}/{rows}")
+    assert response.content == expected
@@ -1,7 +1,8 @@
 import asyncio
 import sys
+import uuid
 from pathlib import Path
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Awaitable, Callable
 
 import pytest
 from httpx import AsyncClient
@@ -68,3 +69,46 @@ async def setup_db() -> AsyncGenerator[AsyncSession, None]:
 async def async_client(setup_db: AsyncSession) -> AsyncClient:
     async with AsyncClient(app=app, base_url="http://test") as client:
         yield client
+
+
+@pytest.fixture
+def make_user(async_client: AsyncClient) -> Callable[..., Awaitable[dict]]:
+    """Create users through the API, with a unique email and sar id by default."""
+
+    async def make_user(sar_id: int | None = None, **fields) -> dict:
+        if sar_id is None:
+            sar_id = uuid.uuid4().int % 1_000_000
+        response = await async_client.post(
+            "/api/v1/user",
+            json={
+                "name": f"Member {sar_id}",
+                "email": f"{uuid.uuid4()}@example.com",
+                "resource_type": "FSAR",
+                "sar_id": sar_id,
+                **fields,
+            },
+        )
+        assert response.status_code == 200
+        return response.json()
+
+    return make_user
+
+
+@pytest.fixture
+def make_form211(async_client: AsyncClient) -> Callable[..., Awaitable[dict]]:
+    """Create Form 211s through the API."""
+
+    async def make_form211(created_by: int, **fields) -> dict:
+        response = await async_client.post(
+            "/api/v1/211",
+            json={
+                "name": "Test incident",
+                "created_by": created_by,
+                "operational_period": 1,
+                **fields,
+            },
+        )
+        assert response.status_code == 200
+        return response.json()
+
+    return make_form211
@@ -0,0 +1,46 @@
+import pytest
+from httpx import AsyncClient
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_bulk_sign_in(async_client: AsyncClient, make_user, make_form211) -> None:
+    first, second = await make_user(), await make_user()
+    form211 = await make_form211(first["id"])
+
+    response = await async_client.post(
+        f"/api/v1/211/{form211['id']}/sign_in/bulk",
+        json=[
+            {"sar_id": first["sar_id"], "name": "First", "created_by": first["id"]},
+            {"sar_id": 1999999999, "name": "Guest", "created_by": first["id"]},
+            {"sar_id": second["sar_id"], "name": "Second", "created_by": first["id"]},
+            {"sar_id": first["sar_id"], "name": "First", "created_by": first["id"]},
+        ],
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == 3
+    assert [item["status"] for item in body["items"]] == [
+        "signed_in",
+        "guest",
+        "signed_in",
+        "duplicate",
+    ]
+    assert [(item["timelog"] or {}).get("sar_id") for item in body["items"]] == [
+        first["sar_id"],
+        0,
+        second["sar_id"],
+        None,
+    ]
+
+    response = await async_client.get(f"/api/v1/211/{form211['id']}/arrivals")
+    assert response.json()["count"] == 3
+
+
+async def test_bulk_sign_in_unknown_form(async_client: AsyncClient, make_user) -> None:
+    user = await make_user()
+    response = await async_client.post(
+        "/api/v1/211/0/sign_in/bulk",
+        json=[{"sar_id": user["sar_id"], "name": "First", "created_by": user["id"]}],
+    )
+    assert response.status_code == 404
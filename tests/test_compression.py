@@ -0,0 +1,110 @@
+import pytest
+import settings
+import zstandard
+from compression import negotiate
+from httpx import AsyncClient
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, encoding",
+    [
+        ("gzip, deflate, br, zstd", "br"),
+        ("gzip, br;q=0.5", "gzip"),
+        ("zstd, gzip", "zstd"),
+        ("*", "br"),
+        ("br;q=0, *;q=0.1", "zstd"),
+        ("gzip;q=0", None),
+        ("identity", None),
+        ("", None),
+    ],
+)
+def test_negotiate(accept_encoding: str, encoding: str | None) -> None:
+    assert negotiate(accept_encoding) == encoding
+
+
+@pytest.mark.asyncio
+async def test_compressed_list(
+    async_client: AsyncClient, make_user, monkeypatch
+) -> None:
+    for _ in range(10):
+        await make_user()
+    path = "/api/v1/user?limit=10"
+    plain = await async_client.get(path, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+    for encoding in ("gzip", "br"):
+        response = await async_client.get(path, headers={"Accept-Encoding": encoding})
+        assert response.headers["content-encoding"] == encoding
+        assert int(response.headers["content-length"]) < len(plain.content)
+        assert response.content == plain.content
+
+    response = await async_client.get(path, headers={"Accept-Encoding": "zstd"})
+    assert response.headers["content-encoding"] == "zstd"
+    body = zstandard.ZstdDecompressor().decompressobj().decompress(response.content)
+    assert body == plain.content
+
+    # Compressed in a worker thread
+    monkeypatch.setattr(settings, "COMPRESSION_THREAD_MIN_SIZE", 0)
+    response = await async_client.get(path, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == plain.content
+
+
+@pytest.mark.asyncio
+async def test_small_response_not_compressed(async_client: AsyncClient) -> None:
+    response = await async_client.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_compressed_etag(
+    async_client: AsyncClient, make_user, make_form211
+) -> None:
+    users = [await make_user() for _ in range(10)]
+    form211 = await make_form211(users[0]["id"])
+    path = f"/api/v1/211/{form211['id']}/arrivals"
+    await async_client.post(
+        f"{path.removesuffix('/arrivals')}/sign_in/bulk",
+        json=[
+            {"sar_id": user["sar_id"], "name": user["name"], "created_by": user["id"]}
+            for user in users
+        ],
+    )
+
+    response = await async_client.get(path, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"')
+
+    response = await async_client.get(
+        path, headers={"Accept-Encoding": "gzip", "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+    response = await async_client.get(
+        path, headers={"Accept-Encoding": "identity", "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag.removeprefix("W/")
+
+
+@pytest.mark.asyncio
+async def test_compressed_stream(
+    async_client: AsyncClient, make_user, make_form211
+) -> None:
+    user = await make_user()
+    form211 = await make_form211(user["id"])
+    await async_client.post(
+        f"/api/v1/211/{form211['id']}/sign_in",
+        json={"sar_id": user["sar_id"], "name": user["name"], "created_by": user["id"]},
+    )
+
+    response = await async_client.get(
+        f"/api/v1/211/{form211['id']}/arrivals/export",
+        headers={"Accept-Encoding": "gzip"},
+    )
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text.startswith("List #,Kind,")
+    assert str(user["sar_id"]) in response.text
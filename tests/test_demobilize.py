@@ -0,0 +1,42 @@
+import pytest
+from httpx import AsyncClient
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_demobilize(async_client: AsyncClient, make_user, make_form211) -> None:
+    first, second, third = await make_user(), await make_user(), await make_user()
+    form211 = await make_form211(first["id"])
+    response = await async_client.post(
+        f"/api/v1/211/{form211['id']}/sign_in/bulk",
+        json=[
+            {"sar_id": user["sar_id"], "name": user["name"], "created_by": first["id"]}
+            for user in (first, second, third)
+        ],
+    )
+    assert response.status_code == 200
+
+    response = await async_client.put(
+        f"/api/v1/211/{form211['id']}/sign_out", json={"sar_ids": [first["sar_id"]]}
+    )
+    assert response.status_code == 200
+    assert [item["sar_id"] for item in response.json()["items"]] == [first["sar_id"]]
+
+    response = await async_client.put(f"/api/v1/211/{form211['id']}/sign_out")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == 2
+    assert {item["sar_id"] for item in body["items"]} == {
+        second["sar_id"],
+        third["sar_id"],
+    }
+    assert all(item["departure_at"] is not None for item in body["items"])
+
+    response = await async_client.put(f"/api/v1/211/{form211['id']}/sign_out")
+    assert response.status_code == 200
+    assert response.json()["count"] == 0
+
+
+async def test_demobilize_unknown_form(async_client: AsyncClient) -> None:
+    response = await async_client.put("/api/v1/211/0/sign_out")
+    assert response.status_code == 404
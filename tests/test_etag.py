@@ -0,0 +1,99 @@
+import pytest
+from db import engine
+from httpx import AsyncClient
+from sqlalchemy import func, select, update
+from timelog.models import Timelog
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_form211_etag(async_client: AsyncClient, make_user, make_form211) -> None:
+    user = await make_user()
+    form211 = await make_form211(user["id"])
+    path = f"/api/v1/211/{form211['id']}"
+
+    response = await async_client.get(path)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    response = await async_client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    await async_client.put(path, json={"name": "Renamed"})
+    response = await async_client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+async def test_arrivals_etag(
+    async_client: AsyncClient, make_user, make_form211
+) -> None:
+    user = await make_user()
+    form211 = await make_form211(user["id"])
+    path = f"/api/v1/211/{form211['id']}/arrivals"
+
+    etag = (await async_client.get(path)).headers["etag"]
+    strong = etag.removeprefix("W/")
+    response = await async_client.get(path, headers={"If-None-Match": f"W/{strong}"})
+    assert response.status_code == 304
+
+    await async_client.post(
+        f"/api/v1/211/{form211['id']}/sign_in",
+        json={"sar_id": user["sar_id"], "name": "Member", "created_by": user["id"]},
+    )
+    response = await async_client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["count"] == 1
+    etag = response.headers["etag"]
+
+    await async_client.put(f"/api/v1/211/{form211['id']}/sign_out/{user['sar_id']}")
+    response = await async_client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+async def test_arrivals_etag_late_commit(
+    async_client: AsyncClient, make_user, make_form211
+) -> None:
+    users = [await make_user() for _ in range(2)]
+    form211 = await make_form211(users[0]["id"])
+    path = f"/api/v1/211/{form211['id']}"
+    first = (
+        await async_client.post(
+            f"{path}/sign_in",
+            json={
+                "sar_id": users[0]["sar_id"],
+                "name": "Member",
+                "created_by": users[0]["id"],
+            },
+        )
+    ).json()
+
+    async with engine.connect() as conn:
+        # Starts before the sign in below, so its sign out has the older
+        # updated_at although it commits last.
+        await conn.execute(select(1))
+        await async_client.post(
+            f"{path}/sign_in",
+            json={
+                "sar_id": users[1]["sar_id"],
+                "name": "Member",
+                "created_by": users[1]["id"],
+            },
+        )
+        etag = (await async_client.get(f"{path}/arrivals")).headers["etag"]
+
+        await conn.execute(
+            update(Timelog)
+            .where(Timelog.id == first["id"])
+            .values(departure_at=func.now())
+        )
+        await conn.commit()
+
+    response = await async_client.get(
+        f"{path}/arrivals", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.json()["items"][0]["departure_at"] is not None
@@ -0,0 +1,85 @@
+import asyncio
+import json
+
+import pytest
+from form211.events import timelog_events
+from form211.routes.form211 import _stream_events
+from httpx import AsyncClient
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_events_stream(
+    async_client: AsyncClient, make_user, make_form211
+) -> None:
+    user = await make_user()
+    form211 = await make_form211(user["id"])
+    other = await make_form211(user["id"])
+    stream = _stream_events(form211["id"])
+
+    async def next_event() -> tuple[str, dict]:
+        chunk = await asyncio.wait_for(stream.__anext__(), 5)
+        fields = dict(
+            line.split(": ", 1) for line in chunk.splitlines() if ": " in line
+        )
+        return fields["event"], json.loads(fields["data"])
+
+    try:
+        assert (await next_event())[0] == "ready"
+
+        await async_client.post(
+            f"/api/v1/211/{other['id']}/sign_in",
+            json={"sar_id": user["sar_id"], "name": "Other", "created_by": user["id"]},
+        )
+        await async_client.post(
+            f"/api/v1/211/{form211['id']}/sign_in",
+            json={"sar_id": user["sar_id"], "name": "Mine", "created_by": user["id"]},
+        )
+        event, timelog = await next_event()
+        assert (event, timelog["name"]) == ("sign_in", "Mine")
+
+        await async_client.put(f"/api/v1/211/{form211['id']}/sign_out/{user['sar_id']}")
+        event, signed_out = await next_event()
+        assert event == "sign_out"
+        assert signed_out["id"] == timelog["id"]
+        assert signed_out["departure_at"] is not None
+
+        await async_client.delete(f"/api/v1/timelog/{timelog['id']}")
+        assert (await next_event())[0] == "delete"
+    finally:
+        await stream.aclose()
+
+
+async def test_events_long_row(
+    async_client: AsyncClient, make_user, make_form211
+) -> None:
+    user = await make_user()
+    form211 = await make_form211(user["id"])
+    name = "x" * 9000
+
+    async with timelog_events.subscribe(form211["id"]) as subscription:
+        response = await async_client.post(
+            f"/api/v1/211/{form211['id']}/sign_in",
+            json={"sar_id": user["sar_id"], "name": name, "created_by": user["id"]},
+        )
+        assert response.status_code == 200
+
+        event = await asyncio.wait_for(subscription.get(), 5)
+        assert event.event == "sign_in"
+        assert json.loads(event.data)["name"] == name
+
+
+async def test_events_lagged_subscriber_resyncs(
+    async_client: AsyncClient, make_user, make_form211
+) -> None:
+    user = await make_user()
+    form211 = await make_form211(user["id"])
+
+    async with timelog_events.subscribe(form211["id"]) as subscription:
+        subscription.lagged.set()
+        assert await asyncio.wait_for(subscription.get(), 1) is None
+
+
+async def test_events_unknown_form(async_client: AsyncClient) -> None:
+    response = await async_client.get("/api/v1/211/0/events")
+    assert response.status_code == 404
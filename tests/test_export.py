@@ -0,0 +1,61 @@
+import csv
+import io
+import json
+
+import pytest
+from httpx import AsyncClient
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+async def form211_with_arrivals(
+    async_client: AsyncClient, make_user, make_form211
+) -> dict:
+    users = [await make_user() for _ in range(3)]
+    form211 = await make_form211(users[0]["id"])
+    response = await async_client.post(
+        f"/api/v1/211/{form211['id']}/sign_in/bulk",
+        json=[
+            {"sar_id": user["sar_id"], "name": user["name"], "created_by": user["id"]}
+            for user in users
+        ],
+    )
+    assert response.status_code == 200
+    return {"form211": form211, "users": users}
+
+
+async def test_export_csv(
+    async_client: AsyncClient, form211_with_arrivals: dict
+) -> None:
+    form211_id = form211_with_arrivals["form211"]["id"]
+    response = await async_client.get(f"/api/v1/211/{form211_id}/arrivals/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0][0] == "List #"
+    assert [row[3] for row in rows[1:]] == [
+        str(user["sar_id"]) for user in form211_with_arrivals["users"]
+    ]
+
+
+async def test_export_ndjson(
+    async_client: AsyncClient, form211_with_arrivals: dict
+) -> None:
+    form211_id = form211_with_arrivals["form211"]["id"]
+    response = await async_client.get(
+        f"/api/v1/211/{form211_id}/arrivals/export", params={"format": "ndjson"}
+    )
+    assert response.status_code == 200
+
+    items = [json.loads(line) for line in response.text.splitlines()]
+    assert [item["sar_id"] for item in items] == [
+        user["sar_id"] for user in form211_with_arrivals["users"]
+    ]
+    assert all(item["departure_at"] is None for item in items)
+
+
+async def test_export_unknown_form(async_client: AsyncClient) -> None:
+    response = await async_client.get("/api/v1/211/0/arrivals/export")
+    assert response.status_code == 404
@@ -0,0 +1,120 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from db import engine
+from form211.models import Form211
+from httpx import AsyncClient
+from sqlalchemy import update
+
+pytestmark = pytest.mark.asyncio
+
+
+def operation(name: str, user: dict, at: str) -> dict:
+    return {
+        "key": str(uuid.uuid4()),
+        "operation": name,
+        "sar_id": user["sar_id"],
+        "name": user["name"],
+        "created_by": user["id"],
+        "at": f"2025-08-01T{at}:00+00:00",
+    }
+
+
+async def test_form211_hours(
+    async_client: AsyncClient, make_user, make_form211
+) -> None:
+    members = [await make_user() for _ in range(3)]
+    form211 = await make_form211(members[0]["id"], operational_period=2)
+    path = f"/api/v1/211/{form211['id']}"
+    response = await async_client.post(
+        f"{path}/operations",
+        json=[
+            operation("sign_in", members[0], "08:00"),
+            operation("sign_out", members[0], "12:30"),
+            operation("sign_in", members[1], "09:00"),
+            operation("sign_out", members[1], "10:00"),
+            operation("sign_in", members[1], "11:00"),
+            operation("sign_out", members[1], "13:00"),
+            # Still on scene
+            operation("sign_in", members[2], "14:00"),
+        ],
+    )
+    assert response.status_code == 200
+    await async_client.post(
+        "/api/v1/timelog",
+        json={
+            "form211_id": form211["id"],
+            "sar_id": 0,
+            "created_by": members[0]["id"],
+            "name": "K9 unit",
+            "resource_type": "K9",
+            "arrival_at": "2025-08-01T10:00:00+00:00",
+            "departure_at": "2025-08-01T11:15:00+00:00",
+        },
+    )
+
+    response = await async_client.get(f"{path}/hours")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["operational_period"] == 2
+    assert body["group_by"] == ["person"]
+    assert body["entries"] == 5
+    hours = {item["name"]: item["hours"] for item in body["items"]}
+    assert hours[members[0]["name"]] == 4.5
+    assert hours[members[1]["name"]] == 3.0
+    assert hours["K9 unit"] == 1.25
+    # Open, so up to now
+    assert hours[members[2]["name"]] > 24
+
+    # Once the period is closed open entries count up to its closed_at.
+    async with engine.begin() as conn:
+        await conn.execute(
+            update(Form211)
+            .where(Form211.id == form211["id"])
+            .values(
+                created_at=datetime(2025, 8, 1, tzinfo=timezone.utc),
+                closed_at=datetime(2025, 8, 1, 18, tzinfo=timezone.utc),
+            )
+        )
+
+    response = await async_client.get(
+        f"{path}/hours", params={"group_by": "resource_type"}
+    )
+    body = response.json()
+    assert body["hours"] == 4.5 + 3 + 4 + 1.25
+    assert body["items"] == [
+        {
+            "sar_id": None,
+            "name": None,
+            "resource_type": "FSAR",
+            "entries": 4,
+            "hours": 11.5,
+        },
+        {
+            "sar_id": None,
+            "name": None,
+            "resource_type": "K9",
+            "entries": 1,
+            "hours": 1.25,
+        },
+    ]
+
+    response = await async_client.get(
+        f"{path}/hours", params={"group_by": ["person", "resource_type"]}
+    )
+    assert len(response.json()["items"]) == 4
+
+
+async def test_form211_hours_empty(
+    async_client: AsyncClient, make_user, make_form211
+) -> None:
+    user = await make_user()
+    form211 = await make_form211(user["id"])
+
+    response = await async_client.get(f"/api/v1/211/{form211['id']}/hours")
+    assert response.json()["items"] == []
+    assert response.json()["hours"] == 0
+
+    response = await async_client.get("/api/v1/211/0/hours")
+    assert response.status_code == 404
@@ -0,0 +1,219 @@
+"""Check that the hot route queries are planned against their indexes.
+
+The statements a route sends are captured off the shared engine and run through
+EXPLAIN with sequential scans disabled. The test tables are tiny, so without that
+the planner would rightly prefer a sequential scan; with it, a statement only
+avoids one if an index matches its predicate.
+
+The tables are analyzed first and the plans are made for the captured parameter
+values: without statistics the planner's choice between two indexes that both
+match depends on what earlier tests left in the tables.
+"""
+import re
+from typing import Generator
+
+import pytest
+from db import engine
+from httpx import AsyncClient
+from sqlalchemy import event
+from user.cache import member_cache
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def captured_sql() -> Generator[list[tuple[str, tuple]], None, None]:
+    statements: list[tuple[str, tuple]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    yield statements
+    event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+
+async def explain(statements: list[tuple[str, tuple]]) -> list[str]:
+    plans = []
+    async with engine.connect() as conn:
+        await conn.exec_driver_sql("ANALYZE users, form211, timelog")
+        await conn.exec_driver_sql("SET enable_seqscan = off")
+        await conn.exec_driver_sql("SET plan_cache_mode = force_custom_plan")
+        for statement, parameters in statements:
+            if not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "WITH")):
+                continue
+            result = await conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+            plans.append("\n".join(row[0] for row in result))
+        await conn.rollback()
+    return plans
+
+
+async def assert_uses_index(
+    captured_sql: list[tuple[str, tuple]], *index_names: str
+) -> None:
+    plans = await explain(captured_sql)
+    assert plans
+    for plan in plans:
+        assert "Seq Scan" not in plan, plan
+    for index_name in index_names:
+        assert any(re.search(rf"\b{index_name}\b", plan) for plan in plans), (
+            index_name,
+            plans,
+        )
+
+
+@pytest.fixture
+def sign_in_member(async_client: AsyncClient, make_user, make_form211):
+    async def sign_in_member() -> dict:
+        """Create a member and a form 211 and sign the member in to it."""
+        user = await make_user()
+        form211 = await make_form211(user["id"])
+        response = await async_client.post(
+            f"/api/v1/211/{form211['id']}/sign_in",
+            json={"sar_id": user["sar_id"], "name": "Test", "created_by": user["id"]},
+        )
+        assert response.status_code == 200
+        return {"user": user, "form211": form211, "sar_id": user["sar_id"]}
+
+    return sign_in_member
+
+
+@pytest.fixture
+async def signed_in(sign_in_member) -> dict:
+    return await sign_in_member()
+
+
+@pytest.mark.parametrize(
+    "path, index_name",
+    [
+        ("/api/v1/user", "ix_users_created_at_id_live"),
+        ("/api/v1/211", "ix_form211_created_at_id_live"),
+        ("/api/v1/timelog", "ix_timelog_created_at_id_live"),
+    ],
+)
+async def test_list_uses_index(
+    async_client: AsyncClient,
+    sign_in_member,
+    captured_sql: list,
+    path: str,
+    index_name: str,
+) -> None:
+    # Two of everything so that the first page has a next_cursor.
+    await sign_in_member()
+    await sign_in_member()
+
+    response = await async_client.get(path, params={"limit": 1})
+    assert response.status_code == 200
+
+    response = await async_client.get(
+        path, params={"limit": 1, "after": response.json()["next_cursor"]}
+    )
+    assert response.status_code == 200
+    await assert_uses_index(captured_sql, index_name)
+
+
+async def test_arrivals_uses_index(
+    async_client: AsyncClient, signed_in: dict, captured_sql: list
+) -> None:
+    response = await async_client.get(
+        f"/api/v1/211/{signed_in['form211']['id']}/arrivals"
+    )
+    assert response.status_code == 200
+    await assert_uses_index(captured_sql, "ix_timelog_form211_id_arrival_at_live")
+
+
+async def test_unchanged_arrivals_poll_uses_index(
+    async_client: AsyncClient, signed_in: dict, captured_sql: list
+) -> None:
+    path = f"/api/v1/211/{signed_in['form211']['id']}/arrivals"
+    response = await async_client.get(path)
+    captured_sql.clear()
+
+    response = await async_client.get(
+        path, headers={"If-None-Match": response.headers["etag"]}
+    )
+    assert response.status_code == 304
+    assert len(captured_sql) == 1
+    await assert_uses_index(captured_sql, "ix_timelog_form211_id_change_xid_id")
+
+
+@pytest.mark.parametrize(
+    "path, index_name",
+    [
+        (
+            "/api/v1/211/{form211_id}/arrivals/changes",
+            "ix_timelog_form211_id_change_xid_id",
+        ),
+        ("/api/v1/timelog/changes", "ix_timelog_change_xid_id"),
+    ],
+)
+async def test_changes_use_index(
+    async_client: AsyncClient,
+    sign_in_member,
+    signed_in: dict,
+    captured_sql: list,
+    path: str,
+    index_name: str,
+) -> None:
+    path = path.format(form211_id=signed_in["form211"]["id"])
+    watermark = (await async_client.get(path)).json()["watermark"]
+    # Many changes to another form since the watermark, which a scan of all the
+    # changes would have to filter out.
+    other = await sign_in_member()
+    response = await async_client.post(
+        f"/api/v1/211/{other['form211']['id']}/sign_in/bulk",
+        json=[
+            {"sar_id": 1999999999, "name": "Guest", "created_by": other["user"]["id"]}
+            for _ in range(100)
+        ],
+    )
+    assert response.status_code == 200
+    captured_sql.clear()
+
+    response = await async_client.get(path, params={"since": watermark})
+    assert response.status_code == 200
+    await assert_uses_index(captured_sql, index_name)
+
+
+async def test_sign_in_uses_index(
+    async_client: AsyncClient, signed_in: dict, captured_sql: list
+) -> None:
+    member_cache.clear()
+    response = await async_client.post(
+        f"/api/v1/211/{signed_in['form211']['id']}/sign_in",
+        json={
+            "sar_id": signed_in["sar_id"],
+            "name": "Test",
+            "created_by": signed_in["user"]["id"],
+        },
+    )
+    assert response.status_code == 200
+    await assert_uses_index(captured_sql, "ix_users_sar_id_live")
+
+
+async def test_sign_out_uses_index(
+    async_client: AsyncClient, signed_in: dict, captured_sql: list
+) -> None:
+    # Guests on the same form, so that the open entry is picked out by its sar
+    # id rather than by being the only entry of the form.
+    response = await async_client.post(
+        f"/api/v1/211/{signed_in['form211']['id']}/sign_in/bulk",
+        json=[
+            {
+                "sar_id": 1999999999,
+                "name": "Guest",
+                "created_by": signed_in["user"]["id"],
+            }
+            for _ in range(10)
+        ],
+    )
+    assert response.status_code == 200
+    member_cache.clear()
+    captured_sql.clear()
+    response = await async_client.put(
+        f"/api/v1/211/{signed_in['form211']['id']}/sign_out/{signed_in['sar_id']}"
+    )
+    assert response.status_code == 200
+    await assert_uses_index(
+        captured_sql, "ix_users_sar_id_live", "ix_timelog_form211_id_sar_id_open"
+    )
@@ -0,0 +1,71 @@
+import time
+
+import pytest
+from httpx import AsyncClient
+from user.cache import MemberCache, member_cache
+
+
+def test_lru_eviction() -> None:
+    cache = MemberCache(max_size=2, ttl_seconds=60)
+    cache.put(1, 10)
+    cache.put(2, 20)
+    cache.get_many([1])
+    cache.put(3, None)
+
+    found, missing = cache.get_many([1, 2, 3])
+    assert found == {1: 10, 3: None}
+    assert missing == {2}
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_ttl_expiry(monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = MemberCache(max_size=10, ttl_seconds=5)
+    cache.put(1, 10)
+
+    later = time.monotonic() + 6
+    monkeypatch.setattr(time, "monotonic", lambda: later)
+    assert cache.get_many([1]) == ({}, {1})
+
+
+def test_invalidate_by_user() -> None:
+    cache = MemberCache(max_size=10, ttl_seconds=60)
+    cache.put(1, 10)
+    cache.invalidate(user_id=10)
+    assert cache.get_many([1]) == ({}, {1})
+
+
+@pytest.mark.asyncio
+async def test_user_writes_invalidate(
+    async_client: AsyncClient, make_user, make_form211
+) -> None:
+    user = await make_user()
+    form211 = await make_form211(user["id"])
+    new_sar_id = user["sar_id"] + 1_000_000
+
+    # Cache the new sar id as belonging to nobody.
+    response = await async_client.post(
+        f"/api/v1/211/{form211['id']}/sign_in/bulk",
+        json=[{"sar_id": new_sar_id, "name": "Guest", "created_by": user["id"]}],
+    )
+    assert response.json()["items"][0]["status"] == "guest"
+    hits = member_cache.hits
+    response = await async_client.post(
+        f"/api/v1/211/{form211['id']}/sign_in/bulk",
+        json=[{"sar_id": new_sar_id, "name": "Guest", "created_by": user["id"]}],
+    )
+    assert member_cache.hits == hits + 1
+
+    response = await async_client.put(
+        f"/api/v1/user/{user['id']}", json={**user, "sar_id": new_sar_id}
+    )
+    assert response.status_code == 200
+
+    response = await async_client.post(
+        f"/api/v1/211/{form211['id']}/sign_in/bulk",
+        json=[{"sar_id": new_sar_id, "name": "Member", "created_by": user["id"]}],
+    )
+    assert response.json()["items"][0]["status"] == "signed_in"
+
+    response = await async_client.get("/api/v1/admin/member_cache")
+    assert response.status_code == 200
+    assert response.json()["hits"] == member_cache.hits
@@ -0,0 +1,50 @@
+import pytest
+from httpx import AsyncClient
+from prometheus_client.parser import text_string_to_metric_families
+
+pytestmark = pytest.mark.asyncio
+
+ARRIVALS = "/api/v1/211/{form211_id}/arrivals"
+
+
+async def get_samples(async_client: AsyncClient) -> dict:
+    response = await async_client.get("/metrics")
+    assert response.status_code == 200
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(response.text)
+        for sample in family.samples
+    }
+
+
+async def test_metrics(async_client: AsyncClient, make_user, make_form211) -> None:
+    user = await make_user()
+    form211 = await make_form211(user["id"])
+    route = (("method", "GET"), ("route", ARRIVALS))
+    before = await get_samples(async_client)
+
+    await async_client.get(f"/api/v1/211/{form211['id']}/arrivals")
+    await async_client.get(f"/api/v1/211/{form211['id']}/arrivals")
+    await async_client.get("/api/v1/211/0")
+    await async_client.get("/api/v1/not_a_route")
+    samples = await get_samples(async_client)
+
+    def delta(name: str, labels: tuple) -> float:
+        key = (name, tuple(sorted(labels)))
+        return samples.get(key, 0) - before.get(key, 0)
+
+    assert delta("http_requests_total", (*route, ("status", "200"))) == 2
+    assert delta("http_request_duration_seconds_count", route) == 2
+    # The ETag query and the arrivals query, twice
+    assert delta("db_queries_total", route) == 4
+    assert delta("db_query_duration_seconds_count", route) == delta(
+        "db_queries_total", route
+    )
+    assert (
+        delta(
+            "http_requests_total",
+            (("method", "GET"), ("route", "unmatched"), ("status", "404")),
+        )
+        == 1
+    )
+    assert samples[("http_requests_in_progress", (("method", "GET"),))] == 1
@@ -0,0 +1,141 @@
+import uuid
+
+import pytest
+from httpx import AsyncClient
+
+pytestmark = pytest.mark.asyncio
+
+
+def sign_in(user: dict, **fields) -> dict:
+    return {
+        "key": str(uuid.uuid4()),
+        "operation": "sign_in",
+        "sar_id": user["sar_id"],
+        "name": user["name"],
+        "created_by": user["id"],
+        **fields,
+    }
+
+
+def sign_out(sar_id: int, **fields) -> dict:
+    return {
+        "key": str(uuid.uuid4()),
+        "operation": "sign_out",
+        "sar_id": sar_id,
+        **fields,
+    }
+
+
+async def test_apply_operations(
+    async_client: AsyncClient, make_user, make_form211
+) -> None:
+    members = [await make_user() for _ in range(3)]
+    form211 = await make_form211(members[0]["id"])
+    path = f"/api/v1/211/{form211['id']}"
+    response = await async_client.post(
+        f"{path}/sign_in",
+        json={
+            "sar_id": members[1]["sar_id"],
+            "name": "Member",
+            "created_by": members[1]["id"],
+        },
+    )
+    open_timelog = response.json()
+
+    guest = {**members[0], "sar_id": 999_999_999}
+    operations = [
+        sign_in(members[0], at="2025-08-01T08:00:00+00:00"),
+        sign_in(guest),
+        sign_out(members[0]["sar_id"], at="2025-08-01T17:30:00+00:00"),
+        sign_out(members[1]["sar_id"]),
+        sign_out(members[2]["sar_id"]),
+        sign_out(guest["sar_id"]),
+    ]
+    response = await async_client.post(f"{path}/operations", json=operations)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == 6
+    assert [item["status"] for item in body["items"]] == [
+        "signed_in",
+        "guest",
+        "signed_out",
+        "signed_out",
+        "not_checked_in",
+        "not_member",
+    ]
+    assert not any(item["duplicate"] for item in body["items"])
+
+    signed_in, guest_in, signed_out, open_out = (
+        item["timelog"] for item in body["items"][:4]
+    )
+    assert signed_out == signed_in
+    assert signed_in["arrival_at"] == "2025-08-01T08:00:00Z"
+    assert signed_in["departure_at"] == "2025-08-01T17:30:00Z"
+    assert guest_in["sar_id"] == 0
+    assert guest_in["departure_at"] is None
+    assert open_out["id"] == open_timelog["id"]
+    assert open_out["departure_at"] is not None
+    assert body["items"][4]["timelog"] is None
+
+    arrivals = (await async_client.get(f"{path}/arrivals")).json()
+    assert arrivals["count"] == 3
+
+    # A retried upload changes nothing and gets the same results back.
+    response = await async_client.post(f"{path}/operations", json=operations)
+    assert response.status_code == 200
+    retried = response.json()
+    assert retried["count"] == 0
+    assert all(item["duplicate"] for item in retried["items"])
+    assert [{**item, "duplicate": False} for item in retried["items"]] == body["items"]
+    assert (await async_client.get(f"{path}/arrivals")).json()["count"] == 3
+
+
+async def test_operations_default_to_now(
+    async_client: AsyncClient, make_user, make_form211
+) -> None:
+    members = [await make_user() for _ in range(3)]
+    form211 = await make_form211(members[0]["id"])
+    operations = [
+        sign_in(members[0]),
+        sign_in(members[1], at="2025-08-01T08:00:00+00:00"),
+        sign_out(members[0]["sar_id"]),
+        sign_in(members[2]),
+    ]
+    response = await async_client.post(
+        f"/api/v1/211/{form211['id']}/operations", json=operations
+    )
+    assert response.status_code == 200
+    timelogs = [item["timelog"] for item in response.json()["items"]]
+
+    # Every entry comes back with the operation that signed it in
+    assert [timelog["sar_id"] for timelog in timelogs] == [
+        member["sar_id"] for member in (members[0], members[1], *members[::2])
+    ]
+    assert timelogs[0] == timelogs[2]
+    assert timelogs[0]["arrival_at"] is not None
+    assert timelogs[0]["departure_at"] is not None
+    assert timelogs[1]["arrival_at"] == "2025-08-01T08:00:00Z"
+    assert timelogs[1]["departure_at"] is None
+    assert timelogs[3]["arrival_at"] is not None
+    assert timelogs[3]["departure_at"] is None
+
+
+async def test_repeated_key(async_client: AsyncClient, make_user, make_form211) -> None:
+    member = await make_user()
+    form211 = await make_form211(member["id"])
+    operation = sign_in(member)
+
+    response = await async_client.post(
+        f"/api/v1/211/{form211['id']}/operations",
+        json=[operation, sign_in(member), operation],
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == 2
+    assert [item["duplicate"] for item in body["items"]] == [False, False, True]
+    assert body["items"][2]["timelog"] == body["items"][0]["timelog"]
+
+
+async def test_operations_form211_not_found(async_client: AsyncClient) -> None:
+    response = await async_client.post("/api/v1/211/0/operations", json=[sign_out(1)])
+    assert response.status_code == 404
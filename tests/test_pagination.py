@@ -0,0 +1,75 @@
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+from httpx import AsyncClient
+from pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip() -> None:
+    created_at = datetime(2025, 7, 4, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+
+def test_invalid_cursor() -> None:
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor("not a cursor")
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_list_users_pages(async_client: AsyncClient, make_user) -> None:
+    """Walking next_cursor returns every row once, newest first."""
+    created = [await make_user() for _ in range(3)]
+
+    response = await async_client.get("/api/v1/user", params={"limit": 2})
+    assert response.status_code == 200
+    first_page = response.json()
+    assert [item["id"] for item in first_page["items"]] == [
+        created[2]["id"],
+        created[1]["id"],
+    ]
+    assert first_page["next_cursor"] is not None
+
+    response = await async_client.get(
+        "/api/v1/user", params={"limit": 2, "after": first_page["next_cursor"]}
+    )
+    assert response.status_code == 200
+    assert response.json()["items"][0]["id"] == created[0]["id"]
+
+
+@pytest.mark.asyncio
+async def test_list_rejects_bad_cursor(async_client: AsyncClient) -> None:
+    response = await async_client.get("/api/v1/timelog", params={"after": "%%%"})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_list_count_modes(async_client: AsyncClient, make_user) -> None:
+    for _ in range(3):
+        await make_user()
+
+    response = await async_client.get("/api/v1/user", params={"limit": 1})
+    body = response.json()
+    assert body["count_mode"] == "exact"
+    assert body["count"] >= 3
+
+    response = await async_client.get(
+        "/api/v1/user", params={"limit": 1, "after": body["next_cursor"]}
+    )
+    # Counted on the first page only
+    assert response.json()["count_mode"] == "exact"
+    assert response.json()["count"] is None
+
+    response = await async_client.get(
+        "/api/v1/user", params={"limit": 1, "count": "estimate"}
+    )
+    assert response.json()["count_mode"] == "estimate"
+    assert isinstance(response.json()["count"], int)
+
+    response = await async_client.get(
+        "/api/v1/user", params={"limit": 1, "count": "none"}
+    )
+    assert response.json()["count_mode"] == "none"
+    assert response.json()["count"] is None
+    assert len(response.json()["items"]) == 1
@@ -0,0 +1,50 @@
+import pytest
+import test_settings
+from httpx import AsyncClient
+from pool import InstrumentedPool
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_pool_stats(async_client: AsyncClient, make_user) -> None:
+    await make_user()
+
+    response = await async_client.get("/api/v1/admin/pool")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["pool_size"] == test_settings.DB_POOL_SIZE
+    assert body["max_overflow"] == test_settings.DB_MAX_OVERFLOW
+    assert body["checked_out"] == 0
+    assert body["checkouts"] >= 1
+    assert body["connects"] >= 1
+    assert body["wait_ms_max"] >= body["wait_ms_avg"] >= 0
+
+
+async def test_pool_counts_timeouts_and_churn() -> None:
+    engine = create_async_engine(
+        test_settings.SQLALCHEMY_DATABASE_URL,
+        poolclass=InstrumentedPool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+        connect_args={"ssl": False},
+    )
+    pool = engine.pool
+    try:
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+            with pytest.raises(exc.TimeoutError):
+                async with engine.connect():
+                    pass
+            await connection.invalidate()
+
+        assert pool.checkouts == 1
+        assert pool.checkout_timeouts == 1
+        assert pool.wait_seconds_max >= 0.1
+        assert pool.connects == 1
+        assert pool.invalidations == 1
+        assert pool.closes == 1
+    finally:
+        await engine.dispose()
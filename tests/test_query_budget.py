@@ -0,0 +1,42 @@
+import logging
+import re
+
+import pytest
+import settings
+from httpx import AsyncClient
+from metrics import QueryBudgetExceeded
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_server_timing(async_client: AsyncClient, make_user) -> None:
+    user = await make_user()
+
+    response = await async_client.get(f"/api/v1/user/{user['id']}")
+    assert re.fullmatch(
+        r'db;desc="1 queries";dur=[\d.]+, app;dur=[\d.]+',
+        response.headers["server-timing"],
+    )
+
+
+async def test_query_budget_strict(
+    async_client: AsyncClient, make_user, monkeypatch
+) -> None:
+    user = await make_user()
+    monkeypatch.setattr(settings, "QUERY_BUDGET", 0)
+
+    with pytest.raises(QueryBudgetExceeded, match="1 queries, over its budget of 0"):
+        await async_client.get(f"/api/v1/user/{user['id']}")
+
+
+async def test_query_budget_warning(
+    async_client: AsyncClient, make_user, monkeypatch, caplog
+) -> None:
+    user = await make_user()
+    monkeypatch.setattr(settings, "QUERY_BUDGET", 0)
+    monkeypatch.setattr(settings, "QUERY_BUDGET_STRICT", False)
+
+    with caplog.at_level(logging.WARNING, logger="metrics"):
+        response = await async_client.get(f"/api/v1/user/{user['id']}")
+    assert response.status_code == 200
+    assert "GET /api/v1/user/{user_id} ran 1 queries" in caplog.text
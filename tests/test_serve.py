@@ -0,0 +1,28 @@
+import pytest
+import settings
+from serve import available_cpus, worker_count
+
+
+def test_available_cpus() -> None:
+    assert available_cpus() >= 1
+
+
+@pytest.mark.parametrize(
+    "cpus, budget, concurrency, workers",
+    [
+        (4, 90, 0, 4),  # 16 connections a worker, the CPUs are the limit
+        (8, 40, 0, 2),  # the connection budget is the limit
+        (8, 10, 0, 1),  # always at least one
+        (8, 90, 3, 3),  # WEB_CONCURRENCY wins
+    ],
+)
+def test_worker_count(
+    monkeypatch: pytest.MonkeyPatch,
+    cpus: int,
+    budget: int,
+    concurrency: int,
+    workers: int,
+) -> None:
+    monkeypatch.setattr(settings, "DB_CONNECTION_BUDGET", budget)
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", concurrency)
+    assert worker_count(cpus) == workers
@@ -12,3 +12,37 @@ SQLALCHEMY_DATABASE_URL = (
     f"postgresql+asyncpg://{PG_USER}:{PG_PASSWORD}@{PG_HOST}:{PG_PORT}/{PG_DB}"
 )
 SQLALCHEMY_ECHO = False
+
+# Connection pool settings
+DB_POOL_SIZE = 5
+DB_MAX_OVERFLOW = 10
+DB_POOL_TIMEOUT = 30.0
+DB_POOL_RECYCLE = 1800
+DB_POOL_PRE_PING = False
+DB_STATEMENT_CACHE_SIZE = 100
+WARMUP_CONNECTIONS = 2
+WARMUP_TIMEOUT = 30.0
+
+# Member cache settings
+MEMBER_CACHE_SIZE = 10000
+MEMBER_CACHE_TTL_SECONDS = 60.0
+
+# Query budget settings, fail any request that goes over it
+QUERY_BUDGET = 10
+QUERY_BUDGET_STRICT = True
+
+# Response compression settings
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_THREAD_MIN_SIZE = 65536
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_LEVEL = 5
+COMPRESSION_ZSTD_LEVEL = 3
+
+# Static files settings
+STATIC_MEMORY_MAX_SIZE = 262144
+
+# Production server settings
+BIND = "0.0.0.0:8000"
+WEB_CONCURRENCY = 0
+DB_CONNECTION_BUDGET = 90
+GRACEFUL_TIMEOUT = 30
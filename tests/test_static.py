@@ -0,0 +1,85 @@
+import gzip
+import os
+from pathlib import Path
+
+import pytest
+from httpx import AsyncClient
+from precompress import precompress
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from static import IMMUTABLE, REVALIDATE, FrontendFiles
+
+SCRIPT = b"console.log('incident board');\n" * 200
+
+
+@pytest.fixture
+async def static_client(tmp_path: Path) -> AsyncClient:
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "assets" / "index-CCpUOCbt.js").write_bytes(SCRIPT)
+    (tmp_path / "assets" / "big-D6zbd5c2.js").write_bytes(SCRIPT * 10)
+    (tmp_path / "index.html").write_text("<html>v1</html>")
+    precompress(tmp_path)
+
+    files = FrontendFiles(directory=str(tmp_path), html=True, memory_max_size=10_000)
+    app = Starlette(routes=[Mount("/", files)])
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        yield client
+
+
+@pytest.mark.parametrize(
+    "path", ["/assets/index-CCpUOCbt.js", "/assets/big-D6zbd5c2.js"]
+)
+@pytest.mark.asyncio
+async def test_precompressed(static_client: AsyncClient, path: str) -> None:
+    expected = SCRIPT if "index" in path else SCRIPT * 10
+
+    response = await static_client.get(path, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-type"].startswith("text/javascript")
+    assert response.headers["cache-control"] == IMMUTABLE
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(expected)
+    assert response.content == expected
+
+    response = await static_client.get(path, headers={"Accept-Encoding": "br, gzip"})
+    assert response.headers["content-encoding"] == "br"
+    assert response.content == expected
+
+    response = await static_client.get(path, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.content == expected
+
+    etag = response.headers["etag"]
+    response = await static_client.get(
+        path, headers={"Accept-Encoding": "identity", "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_index_reloaded(static_client: AsyncClient, tmp_path: Path) -> None:
+    response = await static_client.get("/")
+    assert response.text == "<html>v1</html>"
+    assert response.headers["cache-control"] == REVALIDATE
+
+    index = tmp_path / "index.html"
+    index.write_text("<html>version 2</html>")
+    # Leaves the precompressed copy older than the page, so it is not served
+    stat_result = index.stat()
+    os.utime(index, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 10**9))
+
+    response = await static_client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert response.text == "<html>version 2</html>"
+    assert "content-encoding" not in response.headers
+
+
+def test_precompress_skips_incompressible(tmp_path: Path) -> None:
+    (tmp_path / "tiny.js").write_bytes(b"1")
+    (tmp_path / "logo.png").write_bytes(SCRIPT)
+    (tmp_path / "app.css").write_bytes(SCRIPT)
+
+    written = precompress(tmp_path)
+    assert tmp_path / "app.css.gz" in written
+    assert not any(path.name.startswith(("tiny", "logo")) for path in written)
+    assert gzip.decompress((tmp_path / "app.css.gz").read_bytes()) == SCRIPT
@@ -0,0 +1,68 @@
+import pytest
+from httpx import AsyncClient
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_form211_summary(
+    async_client: AsyncClient, make_user, make_form211
+) -> None:
+    members = [await make_user() for _ in range(3)]
+    form211 = await make_form211(members[0]["id"])
+    path = f"/api/v1/211/{form211['id']}"
+
+    response = await async_client.get(f"{path}/summary")
+    assert response.status_code == 200
+    assert response.json() == {
+        "form211_id": form211["id"],
+        "on_scene": 0,
+        "entries": 0,
+        "items": [],
+    }
+
+    await async_client.post(
+        f"{path}/sign_in/bulk",
+        json=[
+            {"sar_id": member["sar_id"], "name": "Member", "created_by": member["id"]}
+            for member in members
+        ],
+    )
+    response = await async_client.post(
+        "/api/v1/timelog",
+        json={
+            "form211_id": form211["id"],
+            "sar_id": 0,
+            "created_by": members[0]["id"],
+            "name": "K9 unit",
+            "resource_type": "K9",
+            "arrival_at": None,
+            "departure_at": None,
+        },
+    )
+    k9 = response.json()
+    await async_client.put(f"{path}/sign_out/{members[0]['sar_id']}")
+    await async_client.put(f"/api/v1/timelog/{k9['id']}", json={**k9, "name": "Dogs"})
+
+    response = await async_client.get(f"{path}/summary")
+    assert response.json() == {
+        "form211_id": form211["id"],
+        "on_scene": 3,
+        "entries": 4,
+        "items": [
+            {"resource_type": "FSAR", "on_scene": 2, "entries": 3},
+            {"resource_type": "K9", "on_scene": 1, "entries": 1},
+        ],
+    }
+
+    await async_client.delete(f"/api/v1/timelog/{k9['id']}")
+    await async_client.put(f"{path}/sign_out")
+
+    response = await async_client.get(f"{path}/summary")
+    assert response.json()["items"] == [
+        {"resource_type": "FSAR", "on_scene": 0, "entries": 3}
+    ]
+
+
+async def test_form211_summary_not_found(async_client: AsyncClient) -> None:
+    response = await async_client.get("/api/v1/211/0/summary")
+    assert response.status_code == 404
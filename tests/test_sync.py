@@ -0,0 +1,125 @@
+import pytest
+from db import engine
+from httpx import AsyncClient
+from sqlalchemy import insert, select
+from timelog.models import Timelog
+
+pytestmark = pytest.mark.asyncio
+
+
+async def sign_in(async_client: AsyncClient, form211: dict, user: dict) -> dict:
+    response = await async_client.post(
+        f"/api/v1/211/{form211['id']}/sign_in",
+        json={"sar_id": user["sar_id"], "name": "Member", "created_by": user["id"]},
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+async def test_arrival_changes(
+    async_client: AsyncClient, make_user, make_form211
+) -> None:
+    users = [await make_user() for _ in range(3)]
+    form211 = await make_form211(users[0]["id"])
+    other_form211 = await make_form211(users[0]["id"])
+    timelogs = [await sign_in(async_client, form211, user) for user in users]
+    await sign_in(async_client, other_form211, users[0])
+    deleted = await async_client.delete(f"/api/v1/timelog/{timelogs[2]['id']}")
+    assert deleted.status_code == 204
+    path = f"/api/v1/211/{form211['id']}/arrivals/changes"
+
+    # A full sync has the other form's entry left out, the deleted one last.
+    body = (await async_client.get(path)).json()
+    assert [item["id"] for item in body["items"]] == [
+        timelog["id"] for timelog in timelogs
+    ]
+    assert body["items"][2]["deleted_at"] is not None
+    assert body["has_more"] is False
+    watermark = body["watermark"]
+
+    response = await async_client.get(path, params={"since": watermark})
+    assert response.json() == {"items": [], "watermark": watermark, "has_more": False}
+
+    await async_client.put(f"/api/v1/211/{form211['id']}/sign_out/{users[0]['sar_id']}")
+    await async_client.delete(f"/api/v1/timelog/{timelogs[1]['id']}")
+
+    body = (await async_client.get(path, params={"since": watermark})).json()
+    assert [item["id"] for item in body["items"]] == [
+        timelogs[0]["id"],
+        timelogs[1]["id"],
+    ]
+    signed_out, tombstone = body["items"]
+    assert signed_out["departure_at"] is not None
+    assert signed_out["deleted_at"] is None
+    assert tombstone["deleted_at"] is not None
+    assert body["watermark"] != watermark
+
+
+async def test_changes_wait_for_open_transactions(
+    async_client: AsyncClient, make_user, make_form211
+) -> None:
+    users = [await make_user() for _ in range(4)]
+    form211 = await make_form211(users[0]["id"])
+    path = f"/api/v1/211/{form211['id']}/arrivals/changes"
+    await sign_in(async_client, form211, users[3])
+    watermark = (await async_client.get(path)).json()["watermark"]
+
+    async with engine.connect() as conn:
+        # A transaction that has only read holds nothing back
+        await conn.execute(select(1))
+        first = await sign_in(async_client, form211, users[1])
+        body = (await async_client.get(path, params={"since": watermark})).json()
+        assert [item["id"] for item in body["items"]] == [first["id"]]
+        watermark = body["watermark"]
+
+        # Once it has written, what commits after it waits for it to end
+        await conn.execute(
+            insert(Timelog).values(
+                form211_id=form211["id"],
+                name="Late",
+                sar_id=0,
+                # Not FSAR, whose form211_summary row the sign in locks
+                resource_type="K9",
+                created_by=users[0]["id"],
+            )
+        )
+        second = await sign_in(async_client, form211, users[2])
+
+        response = await async_client.get(path, params={"since": watermark})
+        assert response.json()["items"] == []
+        assert response.json()["watermark"] == watermark
+        await conn.commit()
+
+    response = await async_client.get(path, params={"since": watermark})
+    assert [item["name"] for item in response.json()["items"]] == [
+        "Late",
+        second["name"],
+    ]
+
+
+async def test_changes_pages(
+    async_client: AsyncClient, make_user, make_form211
+) -> None:
+    users = [await make_user() for _ in range(3)]
+    form211 = await make_form211(users[0]["id"])
+    timelogs = [await sign_in(async_client, form211, user) for user in users]
+
+    synced = []
+    since = None
+    while True:
+        params = {"limit": 2} if since is None else {"limit": 2, "since": since}
+        body = (await async_client.get("/api/v1/timelog/changes", params=params)).json()
+        synced += [item["id"] for item in body["items"]]
+        since = body["watermark"]
+        if not body["has_more"]:
+            break
+
+    # Other tests' entries are in the feed too.
+    ids = [timelog["id"] for timelog in timelogs]
+    assert [timelog_id for timelog_id in synced if timelog_id in ids] == ids
+    assert len(synced) == len(set(synced))
+
+
+async def test_changes_rejects_bad_watermark(async_client: AsyncClient) -> None:
+    response = await async_client.get("/api/v1/timelog/changes", params={"since": "%"})
+    assert response.status_code == 400
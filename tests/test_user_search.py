@@ -0,0 +1,70 @@
+import uuid
+
+import pytest
+from httpx import AsyncClient
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_search_ranks_matches(async_client: AsyncClient, make_user) -> None:
+    # Seven digits, so that no sar id from other tests or runs contains them.
+    base = 1_000_000 + uuid.uuid4().int % 8_000_000
+    exact, prefix, longer_prefix, substring = (
+        base,
+        int(f"{base}1"),
+        int(f"{base}02"),
+        int(f"1{base}9"),
+    )
+    for sar_id in [substring, longer_prefix, exact, prefix]:
+        await make_user(sar_id)
+    deleted = await make_user(int(f"1{base}99"))
+    await async_client.delete(f"/api/v1/user/{deleted['id']}")
+
+    response = await async_client.get(
+        "/api/v1/user/search", params={"sar_id": str(base)}
+    )
+    assert response.status_code == 200
+    assert [(item["sar_id"], item["match"]) for item in response.json()["items"]] == [
+        (exact, "exact"),
+        (prefix, "prefix"),
+        (longer_prefix, "prefix"),
+        (substring, "substring"),
+    ]
+
+    response = await async_client.get(
+        "/api/v1/user/search", params={"sar_id": str(base), "limit": 2}
+    )
+    assert [item["sar_id"] for item in response.json()["items"]] == [exact, prefix]
+
+    response = await async_client.get(f"/api/v1/user/search_by_id/{base}")
+    assert response.status_code == 200
+    assert response.json()["sar_id"] == exact
+
+
+@pytest.mark.parametrize(
+    "sar_id", ["2", "21", "2147", "21474", "2147483647", "3000000000", "9999999999"]
+)
+async def test_search_near_sar_id_max(async_client: AsyncClient, sar_id: str) -> None:
+    # Prefix ranges that reach past the largest SAR ID, and values above it
+    response = await async_client.get("/api/v1/user/search", params={"sar_id": sar_id})
+    assert response.status_code == 200
+
+    response = await async_client.get(f"/api/v1/user/search_by_id/{sar_id}")
+    assert response.status_code in (200, 404)
+
+
+async def test_search_finds_sar_id_max(async_client: AsyncClient, make_user) -> None:
+    user = await make_user(2147483647)
+
+    response = await async_client.get(
+        "/api/v1/user/search", params={"sar_id": "21474836", "limit": 50}
+    )
+    await async_client.delete(f"/api/v1/user/{user['id']}")
+    assert (user["id"], "prefix") in [
+        (item["id"], item["match"]) for item in response.json()["items"]
+    ]
+
+
+async def test_search_rejects_non_digits(async_client: AsyncClient) -> None:
+    response = await async_client.get("/api/v1/user/search", params={"sar_id": "12a"})
+    assert response.status_code == 422
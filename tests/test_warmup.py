@@ -0,0 +1,29 @@
+import pytest
+from db import engine
+from httpx import AsyncClient
+from main import app
+from prometheus_client import REGISTRY
+from warmup import HOT_PATHS, readiness, warm_up
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_ready_after_warm_up(async_client: AsyncClient, monkeypatch) -> None:
+    monkeypatch.setattr(readiness, "ready", False)
+    response = await async_client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "warming up"
+
+    labels = {"method": "GET", "route": "/api/v1/user", "status": "200"}
+    requests = REGISTRY.get_sample_value("http_requests_total", labels) or 0
+    checkouts = engine.pool.checkouts
+    await warm_up(app)
+    assert engine.pool.checkedin() >= 2
+    assert engine.pool.checkouts - checkouts >= 2 + 2 * len(HOT_PATHS)
+    # The warm-up requests are not counted as traffic
+    assert (REGISTRY.get_sample_value("http_requests_total", labels) or 0) == requests
+
+    monkeypatch.setattr(readiness, "ready", True)
+    response = await async_client.get("/ready")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ready"}
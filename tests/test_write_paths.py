@@ -0,0 +1,128 @@
+import pytest
+from httpx import AsyncClient
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_user_writes(async_client: AsyncClient, make_user) -> None:
+    user = await make_user(resource_type="FSAR")
+
+    response = await async_client.put(
+        f"/api/v1/user/{user['id']}",
+        json={**user, "name": "Renamed", "resource_type": "K9"},
+    )
+    assert response.status_code == 200
+    assert response.json()["name"] == "Renamed"
+    assert response.json()["resource_type"] == "K9"
+    assert response.json()["updated_at"] >= user["updated_at"]
+
+    response = await async_client.delete(f"/api/v1/user/{user['id']}")
+    assert response.status_code == 204
+    response = await async_client.delete(f"/api/v1/user/{user['id']}")
+    assert response.status_code == 404
+    response = await async_client.put(f"/api/v1/user/{user['id']}", json=user)
+    assert response.status_code == 404
+
+
+async def test_form211_writes(
+    async_client: AsyncClient, make_user, make_form211
+) -> None:
+    user = await make_user()
+    form211 = await make_form211(user["id"], name="Initial")
+    assert form211["name"] == "Initial"
+
+    response = await async_client.put(
+        f"/api/v1/211/{form211['id']}", json={"name": "Renamed"}
+    )
+    assert response.status_code == 200
+    assert response.json()["name"] == "Renamed"
+
+    response = await async_client.delete(f"/api/v1/211/{form211['id']}")
+    assert response.status_code == 204
+    response = await async_client.get(f"/api/v1/211/{form211['id']}")
+    assert response.status_code == 404
+
+
+async def test_timelog_writes(
+    async_client: AsyncClient, make_user, make_form211
+) -> None:
+    user = await make_user()
+    form211 = await make_form211(user["id"])
+    timelog = {
+        "form211_id": form211["id"],
+        "sar_id": user["sar_id"],
+        "created_by": user["id"],
+        "name": "Walk in",
+        "resource_type": "FSAR",
+        "arrival_at": None,
+        "departure_at": None,
+    }
+
+    response = await async_client.post("/api/v1/timelog", json=timelog)
+    assert response.status_code == 200
+    created = response.json()
+    assert created["arrival_at"] is not None
+
+    response = await async_client.put(
+        f"/api/v1/timelog/{created['id']}", json={**timelog, "name": "Renamed"}
+    )
+    assert response.status_code == 200
+    assert response.json()["name"] == "Renamed"
+
+    response = await async_client.delete(f"/api/v1/timelog/{created['id']}")
+    assert response.status_code == 204
+    response = await async_client.delete(f"/api/v1/timelog/{created['id']}")
+    assert response.status_code == 404
+
+
+async def test_sign_in_and_out(
+    async_client: AsyncClient, make_user, make_form211
+) -> None:
+    user = await make_user()
+    form211 = await make_form211(user["id"])
+
+    response = await async_client.put(
+        f"/api/v1/211/{form211['id']}/sign_out/{user['sar_id']}"
+    )
+    assert response.json()["detail"] == "User not checked in."
+
+    response = await async_client.post(
+        f"/api/v1/211/{form211['id']}/sign_in",
+        json={"sar_id": user["sar_id"], "name": "Member", "created_by": user["id"]},
+    )
+    assert response.status_code == 200
+    assert response.json()["departure_at"] is None
+
+    response = await async_client.put(
+        f"/api/v1/211/{form211['id']}/sign_out/{user['sar_id']}"
+    )
+    assert response.status_code == 200
+    assert response.json()["departure_at"] is not None
+
+
+async def test_sign_in_and_out_not_found(
+    async_client: AsyncClient, make_user, make_form211
+) -> None:
+    user = await make_user()
+    form211 = await make_form211(user["id"])
+    guest_sar_id = user["sar_id"] + 1_000_000
+
+    response = await async_client.post(
+        "/api/v1/211/0/sign_in",
+        json={"sar_id": user["sar_id"], "name": "Member", "created_by": user["id"]},
+    )
+    assert response.json()["detail"] == "Form 211 not found"
+
+    response = await async_client.post(
+        f"/api/v1/211/{form211['id']}/sign_in",
+        json={"sar_id": guest_sar_id, "name": "Guest", "created_by": user["id"]},
+    )
+    assert response.json()["sar_id"] == 0
+
+    response = await async_client.put(f"/api/v1/211/0/sign_out/{user['sar_id']}")
+    assert response.json()["detail"] == "Form 211 not found"
+
+    response = await async_client.put(
+        f"/api/v1/211/{form211['id']}/sign_out/{guest_sar_id}"
+    )
+    assert response.json()["detail"] == "SAR ID not found"